@@ -0,0 +1,178 @@
+import os
+import mmap
+import shutil
+import numpy as np
+import pandas as pd
+
+import gamelog
+
+# Constants
+ARCHIVE_ENABLED = os.environ.get('NBA_ARCHIVE', '1') != '0' # 0 skips writing snapshots
+HEADER_CACHE_SIZE = 20000 # Parsed .npy headers kept (one per column file)
+
+# Every run's fetched data is kept as one snapshot per day and table, one .npy
+# file per column: .nba_data/archive/<table>/<YYYY-MM-DD>/<COLUMN>.npy.
+# Plain .npy files can be memory-mapped, so a history query over hundreds of
+# days only opens the columns it asks for and only pages in the rows it keeps.
+
+def table_dir(table):
+    return os.path.join(gamelog.DATA_DIR, 'archive', table)
+
+def snapshot_dates(table):
+    """
+    Returns the sorted snapshot dates (as 'YYYY-MM-DD' strings) stored for a table.
+    """
+    try:
+        names = os.listdir(table_dir(table))
+    except OSError:
+        return []
+    return sorted(n for n in names if len(n) == 10) # Skips .tmp/.old directories
+
+def _to_array(values):
+    """Column as a memory-mappable array: strings fixed-width, dates datetime64[D]."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values).values.astype('datetime64[D]')
+    if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object or pd.api.types.is_string_dtype(values):
+        return values.astype(object).fillna('').astype(str).to_numpy().astype('U')
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=bool)
+    return values.to_numpy()
+
+def write_table(table, snapshot_date, df):
+    """
+    Stores df as the table's snapshot for snapshot_date, replacing an earlier
+    one of the same day as a whole. An empty frame (failed fetch) is not
+    written, so it never replaces good data.
+    """
+    if df is None or df.empty:
+        return False
+    target = os.path.join(table_dir(table), snapshot_date)
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for col in df.columns:
+        np.save(os.path.join(tmp, str(col) + '.npy'), _to_array(df[col]), allow_pickle=False)
+
+    # Swap the directory in; readers see either the old or the new snapshot
+    old = target + '.old'
+    if os.path.isdir(target):
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(target, old)
+    os.replace(tmp, target)
+    shutil.rmtree(old, ignore_errors=True)
+    return True
+
+def stats_frame(stats_dict):
+    """Per-period stat frames as one table, with the period in a PERIOD column."""
+    frames = [df.assign(PERIOD=period) for period, df in stats_dict.items() if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def def_ratings_frame(def_ratings):
+    return pd.DataFrame({
+        'TEAM_ABBREVIATION': list(def_ratings),
+        'DEF_RANK': np.array([info['Rank'] for info in def_ratings.values()], dtype=np.int32),
+        'DEF_RATING': np.array([info['DefRtg'] for info in def_ratings.values()], dtype=np.float32),
+    })
+
+def write_snapshot(snapshot_date, schedule, stats_dict, def_ratings):
+    """
+    Archives one run's get_schedule, get_player_stats_multi_period (with the
+    9-cat VALUE/RANK columns) and get_team_defensive_ratings outputs under
+    snapshot_date. Returns the tables written.
+    """
+    day = snapshot_date.isoformat()
+    frames = {
+        'schedule': schedule,
+        'stats': stats_frame(stats_dict),
+        'def_ratings': def_ratings_frame(def_ratings),
+    }
+    return [table for table, df in frames.items() if write_table(table, day, df)]
+
+# path -> (file identity, dtype, length, data offset); columns are 1-D
+_headers = {}
+
+def _open(path):
+    """
+    Memory-maps a column file (None if missing). np.load(mmap_mode='r') re-parses
+    the .npy header on every call, which dominates a query touching hundreds of
+    files, so parsed headers are cached per file version (a rewritten snapshot
+    is a new file).
+    """
+    try:
+        st = os.stat(path)
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with open(path, 'rb') as f:
+            cached = _headers.get(path)
+            if cached is None or cached[0] != identity:
+                version = np.lib.format.read_magic(f)
+                read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+                shape, _, dtype = read_header(f)
+                if len(_headers) >= HEADER_CACHE_SIZE:
+                    _headers.clear()
+                cached = _headers[path] = (identity, dtype, int(np.prod(shape)), f.tell())
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    _, dtype, length, offset = cached
+    return np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+
+def _bound(value, default):
+    return pd.Timestamp(value).date().isoformat() if value is not None else default
+
+def load_history(table, columns, start=None, end=None, where=None):
+    """
+    Loads columns of a table across its snapshots from start to end
+    (inclusive, default all), with a SNAPSHOT_DATE column in front.
+    where ({column: value}) keeps only matching rows; it is applied per
+    snapshot on the memory-mapped columns, so only kept rows are copied.
+    A column missing from a snapshot reads as NaN.
+    """
+    lo, hi = _bound(start, ''), _bound(end, '9999-12-31')
+    where = where or {}
+    days, parts = [], {c: [] for c in columns}
+    for day in snapshot_dates(table):
+        if not (lo <= day <= hi):
+            continue
+        path = os.path.join(table_dir(table), day)
+        keep = None
+        for col, value in where.items():
+            values = _open(os.path.join(path, col + '.npy'))
+            match = values == value if values is not None else np.zeros(0, dtype=bool)
+            keep = match if keep is None else keep & match
+            if not keep.any():
+                break
+        rows = np.flatnonzero(keep) if keep is not None else None
+        if rows is not None and len(rows) == 0:
+            continue
+
+        n = len(rows) if rows is not None else 0
+        loaded = {}
+        for col in columns:
+            values = _open(os.path.join(path, col + '.npy'))
+            if values is not None:
+                loaded[col] = np.array(values if rows is None else values[rows])
+                n = len(loaded[col])
+        for col in columns:
+            parts[col].append(loaded[col] if col in loaded else np.full(n, np.nan))
+        days.append(np.full(n, np.datetime64(day, 'D')))
+
+    if not days:
+        return pd.DataFrame(columns=['SNAPSHOT_DATE'] + list(columns))
+    data = {'SNAPSHOT_DATE': np.concatenate(days)}
+    data.update({c: np.concatenate(parts[c]) for c in columns})
+    return pd.DataFrame(data)
+
+def player_trend(player_id, column='VALUE', period='L7', start=None, end=None):
+    """
+    A player's column (e.g. the L7 9-cat VALUE) for one stat period, one value
+    per snapshot date.
+    """
+    df = load_history('stats', [column], start, end, where={'PLAYER_ID': int(player_id), 'PERIOD': period})
+    return df.set_index('SNAPSHOT_DATE')[column]
+
+def team_defense_trend(abbr, start=None, end=None):
+    """A team's defensive rank and rating, one row per snapshot date."""
+    df = load_history('def_ratings', ['DEF_RANK', 'DEF_RATING'], start, end, where={'TEAM_ABBREVIATION': abbr})
+    return df.set_index('SNAPSHOT_DATE')
@@ -0,0 +1,70 @@
+import os
+import gzip
+import hashlib
+
+import metrics
+
+try:
+    import brotli # In requirements.txt; a local install without it skips the .br variants
+except ImportError:
+    brotli = None
+
+# Constants
+HASH_LENGTH = 12 # Hex digits of the content hash in artifact names
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Split reports (REPORT_MODE=split) keep each week tab in its own file next to
+# the shell page, named <week id>.<content hash>.html: an unchanged week keeps
+# its name from one day to the next, so browsers and CDNs can cache it for good.
+# Each file also gets .gz (and .br) variants, ready for servers that serve
+# precompressed files (nginx gzip_static/brotli_static and the like).
+
+def asset_dir(output_file):
+    """Directory of a split report's artifacts: next to the page, named after it."""
+    return os.path.splitext(output_file)[0] + '_weeks'
+
+def _write(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+@metrics.timed('publish_artifact')
+def publish(directory, name, data):
+    """
+    Stores data (bytes) as <name>.<hash>.html in directory, plus compressed
+    variants. An artifact with the same content already there is left alone.
+    Returns the file name (relative to directory).
+    """
+    filename = f"{name}.{hashlib.sha1(data).hexdigest()[:HASH_LENGTH]}.html"
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        metrics.add(reused_fragments=1)
+        return filename
+
+    os.makedirs(directory, exist_ok=True)
+    metrics.add(bytes=len(data))
+    # Compressed variants first: the plain file marks the artifact complete
+    _write(path + '.gz', gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    if brotli is not None:
+        _write(path + '.br', brotli.compress(data, quality=BROTLI_QUALITY))
+    _write(path, data)
+    return filename
+
+def prune(directory, keep):
+    """
+    Deletes the artifacts (and their variants) of directory whose file name
+    is not in keep, so only the current report's weeks remain.
+    """
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,166 @@
+"""
+Offline benchmark of the report pipeline.
+
+Replays synthetic (or recorded) stats.nba.com responses with the cache forced
+offline through the entry points the report itself runs
+(generate_report.fetch_report_inputs, build_league_data and write_report_file),
+and reads the per-stage timings they record from metrics.snapshot(). Stages
+nest (fetch_all holds the sync and fetch stages, write_report the week grids,
+fragments and split assets), so 'total' is timed separately.
+
+    python benchmarks/bench_report.py                      # every scale
+    python benchmarks/bench_report.py --scale small --repeat 5
+    python benchmarks/bench_report.py --fixtures .nba_cache --scale small
+
+Results are written as JSON (default bench_results.json) for regression tracking.
+"""
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import cache
+import gamelog
+import metrics
+import fragments
+import artifacts
+import generate_report
+import fixtures
+
+# name -> (players, week tabs, rest-of-season table over the full season schedule)
+SCALES = {
+    'small': (500, 4, False),
+    'large': (5000, 26, False),
+    'season': (500, 4, True),
+}
+
+def report_bytes(output_file):
+    """Size of the page plus its split-mode week files, if any."""
+    total = os.path.getsize(output_file)
+    weeks_dir = artifacts.asset_dir(output_file)
+    if os.path.isdir(weeks_dir):
+        total += sum(os.path.getsize(os.path.join(weeks_dir, name)) for name in os.listdir(weeks_dir))
+    return total
+
+def run_once(league, today):
+    """
+    Runs the report once against the offline cache, the way generate_html_report
+    does. Returns (stage times, report bytes, player count, schedule days).
+    """
+    metrics.reset()
+    t0 = time.perf_counter()
+    inputs = generate_report.fetch_report_inputs([league], today)
+    data = generate_report.build_league_data(inputs, league)
+    used_fragments, _ = generate_report.write_report_file(data, league['output'], league['mode'])
+    if league['mode'] in ('html', 'split'):
+        fragments.prune(used_fragments)
+    total = time.perf_counter() - t0
+
+    times = {name: rec['wall_s'] for name, rec in sorted(metrics.snapshot().items())}
+    times['total'] = total
+    return times, report_bytes(league['output']), len(data['player_df']), len(data['schedule_index'].days)
+
+def bench_scale(name, args, today):
+    n_players, n_weeks, rest_of_season = SCALES[name]
+    w1_start, _, final_end, season = generate_report.report_dates(today, n_weeks)
+
+    workdir = tempfile.mkdtemp(prefix=f'nba-bench-{name}-')
+    try:
+        cache.CACHE_DIR = os.path.join(workdir, 'cache')
+        if args.fixtures:
+            shutil.copytree(args.fixtures, cache.CACHE_DIR)
+            fixture_info = {'source': 'recorded', 'path': os.path.abspath(args.fixtures)}
+        else:
+            season_start = date(int(season[:4]), 10, 21)
+            if season_start >= today:
+                season_start = today - timedelta(days=90)
+            season_end = date(int(season[:4]) + 1, 4, 12) if rest_of_season else None
+            fixture_info = fixtures.write_fixtures(season, w1_start, final_end, n_players, today,
+                                                   season_start=season_start, stats_source=args.stats_source,
+                                                   seed=args.seed, season_end=season_end)
+            fixture_info['source'] = f'synthetic-{args.stats_source}'
+        cache.set_offline(True)
+
+        league = dict(generate_report.DEFAULT_LEAGUE, name=name, weeks=n_weeks, mode=args.mode,
+                      rest_of_season=rest_of_season, roster=args.roster,
+                      output=os.path.join(workdir, 'report.html'))
+        runs = []
+        for r in range(args.repeat):
+            # Every run starts from an empty game-log store and fragment cache, so it
+            # includes the initial sync and renders every week from scratch
+            gamelog.DATA_DIR = os.path.join(workdir, f'data{r}')
+            fragments.FRAGMENT_DIR = os.path.join(workdir, f'fragments{r}')
+            with redirect_stdout(io.StringIO()):
+                times, page_bytes, player_count, n_days = run_once(league, today)
+            runs.append(times)
+
+        stages = {}
+        for stage in runs[0]:
+            samples = [run.get(stage, 0.0) for run in runs]
+            stages[stage] = {'min': min(samples), 'median': statistics.median(samples), 'max': max(samples)}
+        return {
+            'scale': name,
+            'players': player_count,
+            'weeks': n_weeks,
+            'rest_of_season': rest_of_season,
+            'days': n_days,
+            'mode': args.mode,
+            'roster': args.roster,
+            'fixtures': fixture_info,
+            'report_bytes': page_bytes,
+            'stages': stages,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the report pipeline")
+    parser.add_argument('--scale', choices=list(SCALES), action='append', help="scale to run (repeatable, default all)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scale (default 3)")
+    parser.add_argument('--mode', choices=['html', 'json', 'split'], default='html', help="report mode to render")
+    parser.add_argument('--roster', help="planner roster config, so the streaming plans are benchmarked too "
+                             "(default none: no plans, like a report without $NBA_ROSTER)")
+    parser.add_argument('--stats-source', choices=['gamelog', 'dash'], default='gamelog',
+                        help="synthesize LeagueGameLog rows (default) or LeagueDashPlayerStats per period")
+    parser.add_argument('--fixtures', help="replay a recorded cache directory (e.g. .nba_cache) instead of synthetic data; "
+                             "it must have been recorded today for the same date range")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    today = datetime.now().date()
+    results = []
+    for name in args.scale or list(SCALES):
+        print(f"⏱️ Benchmarking {name}...")
+        result = bench_scale(name, args, today)
+        results.append(result)
+        for stage, t in result['stages'].items():
+            print(f"  {stage:<24} {t['median'] * 1000:10.1f} ms (min {t['min'] * 1000:.1f})")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from nba_api.stats.static import teams
+
+import cache
+import utils
+
+# Synthetic stats.nba.com responses, written straight into the response cache
+# under the same keys utils.py uses, so the pipeline replays them offline.
+
+def _team_table():
+    nba_teams = sorted(teams.get_teams(), key=lambda t: t['id'])
+    return np.array([t['id'] for t in nba_teams]), np.array([t['abbreviation'] for t in nba_teams], dtype=object)
+
+def make_schedule(start_date, end_date, rng):
+    """
+    One row per team per game (the LeagueGameFinder layout), 0-15 games a night.
+    """
+    team_ids, abbrs = _team_table()
+    rows = []
+    d = start_date
+    while d <= end_date:
+        n_games = int(rng.integers(0, 16))
+        order = rng.permutation(len(team_ids))[:2 * n_games]
+        for home, away in zip(order[::2], order[1::2]):
+            game_date = d.strftime('%Y-%m-%d')
+            rows.append((int(team_ids[home]), abbrs[home], game_date, f"{abbrs[home]} vs. {abbrs[away]}"))
+            rows.append((int(team_ids[away]), abbrs[away], game_date, f"{abbrs[away]} @ {abbrs[home]}"))
+        d += timedelta(days=1)
+    return pd.DataFrame(rows, columns=['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP'])
+
+def make_season_schedule(start_date, end_date, rng):
+    """
+    One row per game (the ScheduleLeagueV2 SeasonGames layout), 0-15 games a night.
+    """
+    team_ids, abbrs = _team_table()
+    rows = []
+    d = start_date
+    while d <= end_date:
+        order = rng.permutation(len(team_ids))[:2 * int(rng.integers(0, 16))]
+        for home, away in zip(order[::2], order[1::2]):
+            rows.append((f'00225{len(rows):05d}', d.strftime('%Y-%m-%dT00:00:00Z'),
+                         int(team_ids[home]), abbrs[home], int(team_ids[away]), abbrs[away]))
+        d += timedelta(days=1)
+    return pd.DataFrame(rows, columns=['gameId', 'gameDateEst', 'homeTeam_teamId', 'homeTeam_teamTricode',
+                                       'awayTeam_teamId', 'awayTeam_teamTricode'])
+
+def make_players(n_players):
+    team_ids, abbrs = _team_table()
+    team_idx = np.arange(n_players) % len(team_ids)
+    return pd.DataFrame({
+        'PLAYER_ID': np.arange(n_players) + 1000000,
+        'PLAYER_NAME': [f'Player {i}' for i in range(n_players)],
+        'TEAM_ID': team_ids[team_idx],
+        'TEAM_ABBREVIATION': abbrs[team_idx],
+    })
+
+def make_game_logs(players, season_start, last_date, rng, play_rate=0.45):
+    """
+    One row per player-game (the LeagueGameLog player layout) up to last_date.
+    """
+    n_days = max((last_date - season_start).days + 1, 0)
+    played = rng.random((len(players), n_days)) < play_rate
+    p_idx, d_idx = np.nonzero(played)
+    n = len(p_idx)
+
+    fga = rng.integers(0, 25, n)
+    fta = rng.integers(0, 12, n)
+    fg3m = rng.binomial(np.maximum(fga // 3, 0), 0.35)
+    fgm = np.maximum(rng.binomial(fga, 0.47), fg3m)
+    ftm = rng.binomial(fta, 0.78)
+    dates = np.datetime64(season_start, 'D') + d_idx
+    # A random other team as the opponent
+    _, abbrs = _team_table()
+    own = pd.Series(players['TEAM_ABBREVIATION'].to_numpy()[p_idx]).map({a: i for i, a in enumerate(abbrs)}).to_numpy()
+    opponents = abbrs[(own + rng.integers(1, len(abbrs), n)) % len(abbrs)]
+
+    df = pd.DataFrame({
+        'PLAYER_ID': players['PLAYER_ID'].to_numpy()[p_idx],
+        'PLAYER_NAME': players['PLAYER_NAME'].to_numpy()[p_idx],
+        'TEAM_ID': players['TEAM_ID'].to_numpy()[p_idx],
+        'TEAM_ABBREVIATION': players['TEAM_ABBREVIATION'].to_numpy()[p_idx],
+        'GAME_ID': (22500000 + d_idx).astype(str),
+        'GAME_DATE': pd.to_datetime(dates).strftime('%Y-%m-%d'),
+        'MATCHUP': players['TEAM_ABBREVIATION'].to_numpy()[p_idx] + ' vs. ' + opponents,
+        'MIN': rng.uniform(4, 40, n).round(1),
+        'FGM': fgm, 'FGA': fga, 'FG3M': fg3m, 'FTM': ftm, 'FTA': fta,
+        'REB': rng.integers(0, 15, n), 'AST': rng.integers(0, 12, n),
+        'STL': rng.integers(0, 4, n), 'BLK': rng.integers(0, 4, n), 'TOV': rng.integers(0, 6, n),
+    })
+    df['PTS'] = 2 * df['FGM'] + df['FG3M'] + df['FTM']
+    return df
+
+def make_player_index(players, rng):
+    """Listed positions in the PlayerIndex layout."""
+    positions = np.array(['G', 'G-F', 'F', 'F-G', 'F-C', 'C', 'C-F'], dtype=object)
+    return pd.DataFrame({
+        'PERSON_ID': players['PLAYER_ID'].to_numpy(),
+        'TEAM_ABBREVIATION': players['TEAM_ABBREVIATION'].to_numpy(),
+        'POSITION': positions[rng.integers(0, len(positions), len(players))],
+    })
+
+def make_dash_stats(players, rng):
+    """Per-game averages in the LeagueDashPlayerStats layout."""
+    n = len(players)
+    df = players.copy()
+    df['GP'] = rng.integers(1, 60, n)
+    for col, hi in [('MIN', 38), ('PTS', 32), ('REB', 13), ('AST', 10), ('STL', 2.5), ('BLK', 2.5), ('FG3M', 4.5)]:
+        df[col] = rng.uniform(0, hi, n)
+    df['FG_PCT'] = rng.uniform(0.35, 0.65, n)
+    df['FT_PCT'] = rng.uniform(0.5, 0.95, n)
+    return df
+
+def make_team_ratings(rng):
+    team_ids, _ = _team_table()
+    return pd.DataFrame({
+        'TEAM_ID': team_ids,
+        'DEF_RATING': rng.uniform(105, 122, len(team_ids)),
+        'W_PCT': rng.uniform(0.1, 0.9, len(team_ids)),
+    })
+
+def _store(endpoint, params, df):
+    cache.store(cache.make_key(endpoint, params), endpoint, params, [df])
+
+def write_fixtures(season, start_date, end_date, n_players, today, season_start=None, stats_source='gamelog', seed=0,
+                   season_end=None):
+    """
+    Writes every response the report needs for [start_date, end_date] into the cache:
+    the schedule, the team ratings, the player positions, and either the season
+    game logs (stats_source 'gamelog', synced into an empty store) or one
+    LeagueDashPlayerStats response per STAT_PERIODS window ('dash', the fallback path).
+    With season_end, the full season schedule (ScheduleLeagueV2, for rest-of-season
+    reports) from season_start to season_end is written as well.
+    """
+    rng = np.random.default_rng(seed)
+    fmt = '%m/%d/%Y'
+    season_start = season_start or today - timedelta(days=90)
+
+    schedule = make_schedule(start_date, end_date, rng)
+    _store('LeagueGameFinder', {'date_from': start_date.strftime(fmt), 'date_to': end_date.strftime(fmt), 'season': season}, schedule)
+    _store('LeagueDashTeamStats', {'season': season, 'measure': 'Advanced'}, make_team_ratings(rng))
+    season_games = 0
+    if season_end is not None:
+        season_schedule = make_season_schedule(season_start, season_end, rng)
+        _store('ScheduleLeagueV2', {'season': season}, season_schedule)
+        season_games = len(season_schedule)
+
+    players = make_players(n_players)
+    _store('PlayerIndex', {'season': season}, make_player_index(players, rng))
+    if stats_source == 'gamelog':
+        logs = make_game_logs(players, season_start, today - timedelta(days=1), rng)
+        _store('LeagueGameLog', {'season': season, 'date_from': ''}, logs)
+        rows = len(logs)
+    else:
+        for period, (_, window) in utils.STAT_PERIODS.items():
+            date_from = utils.get_period_start(period, today)
+            last_n = window[1] if window and window[0] == 'games' else 0
+            params = {'season': season, 'date_from': date_from.strftime(fmt) if date_from else '', 'last_n_games': last_n}
+            _store('LeagueDashPlayerStats', params, make_dash_stats(players, rng))
+        rows = n_players * len(utils.STAT_PERIODS)
+
+    return {'schedule_rows': len(schedule), 'season_games': season_games, 'player_rows': rows}
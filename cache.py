@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+# Constants
+CACHE_DIR = os.environ.get('NBA_CACHE_DIR', '.nba_cache')
+CACHE_MAX_BYTES = int(os.environ.get('NBA_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+_offline = os.environ.get('NBA_OFFLINE', '') not in ('', '0')
+
+class CacheMiss(Exception):
+    """Raised in offline mode when no cached entry exists for a request."""
+
+def set_offline(enabled=True):
+    """
+    Forces offline mode: every request is served from the cache, stale or not,
+    and nothing is sent to stats.nba.com.
+    """
+    global _offline
+    _offline = bool(enabled)
+
+def is_offline():
+    return _offline
+
+def make_key(endpoint, params):
+    """
+    Builds a stable cache key from the endpoint name and its request parameters.
+    """
+    raw = json.dumps({'endpoint': endpoint, 'params': params}, sort_keys=True, default=str)
+    return f"{endpoint}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]}"
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key + '.json')
+
+def load(key, ttl=None):
+    """
+    Returns the cached list of DataFrames for key, or None.
+    ttl=None accepts an entry of any age (stale reads).
+    """
+    path = _path(key)
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if ttl is not None and age > ttl:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Mark as recently used for eviction (access time is unreliable on noatime mounts)
+    try:
+        os.utime(path, (time.time(), os.path.getmtime(path)))
+    except OSError:
+        pass
+
+    return [pd.DataFrame(fr['data'], columns=fr['columns']) for fr in payload['frames']]
+
+def store(key, endpoint, params, frames):
+    """
+    Writes frames to the cache atomically, then enforces the size bound.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    payload = {
+        'endpoint': endpoint,
+        'params': params,
+        'fetched_at': time.time(),
+        'frames': [df.to_dict('split') for df in frames],
+    }
+    for fr in payload['frames']:
+        fr.pop('index', None)
+
+    path = _path(key)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp, path)
+
+    evict(CACHE_MAX_BYTES)
+
+def evict(max_bytes):
+    """
+    Removes least recently used entries until the cache fits in max_bytes.
+    """
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if n.endswith('.json')]
+    except OSError:
+        return
+
+    entries = []
+    total = 0
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_atime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort() # Oldest access first
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def clear():
+    """Deletes every cached entry."""
+    evict(0)
@@ -0,0 +1,65 @@
+import os
+import argparse
+
+# Only argparse is imported up front, so --help answers instantly; the report
+# modules (pandas, numpy) load after parsing, and nba_api only when a fetch runs.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Fantasy NBA streaming report generator.')
+    parser.add_argument('--mode', choices=['html', 'json', 'split'], default=None,
+                        help='html: tables rendered here; json: data payload rendered in the browser; '
+                             'split: html tables in per-week files loaded on demand (default $REPORT_MODE or html)')
+    parser.add_argument('--output', '-o', default=None, help='Report file (default fantasy_nba_report_v2.html)')
+    parser.add_argument('--weeks', type=int, default=None, help='Horizon in week tabs (default 4)')
+    parser.add_argument('--rest-of-season', action='store_true',
+                        help='Add a games-per-week table through the end of the season, playoff weeks marked (one stored season schedule)')
+    parser.add_argument('--no-browser', action='store_true', help='Do not open the report in a browser (default on CI)')
+    parser.add_argument('--offline', action='store_true', help='Never touch the network: serve API responses from the cache (NBA_OFFLINE=1)')
+    parser.add_argument('--save-snapshot', metavar='PATH', help='Store the fetched report data at PATH for --render-only runs')
+    parser.add_argument('--render-only', metavar='SNAPSHOT',
+                        help='Rebuild the page from a stored snapshot without fetching (nba_api is never imported)')
+    parser.add_argument('--serve', action='store_true', help='Run the report server instead (see server.py)')
+    parser.add_argument('--leagues', metavar='CONFIG',
+                        help='Batch mode: JSON list of league configs, one report each from a single fetch (see generate_report.load_leagues)')
+    parser.add_argument('--workers', type=int, default=None, help='Batch mode worker processes (default $NBA_BATCH_WORKERS or one per CPU)')
+    args = parser.parse_args(argv)
+    if args.weeks is not None and args.weeks < 1:
+        parser.error('--weeks must be at least 1')
+    if args.render_only and args.offline:
+        parser.error('--render-only never fetches; --offline is not needed')
+    if args.serve and args.mode == 'split':
+        parser.error('--serve renders pages in memory; use --mode html or json')
+    if args.leagues and (args.output or args.weeks or args.rest_of_season or args.render_only or args.save_snapshot or args.serve):
+        parser.error('--leagues takes the output, horizon and snapshot settings from the league config')
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.offline:
+        os.environ['NBA_OFFLINE'] = '1' # Read by cache.py at import
+
+    if args.serve:
+        import server
+        server.serve(mode=args.mode or 'json')
+        return
+
+    import metrics
+    import generate_report
+    options = {
+        'mode': args.mode,
+        'output_file': args.output or generate_report.OUTPUT_FILE,
+        'n_weeks': args.weeks or generate_report.REPORT_WEEKS,
+        'open_browser': generate_report.OPEN_BROWSER and not args.no_browser,
+        'snapshot': args.render_only,
+        'save_snapshot': args.save_snapshot,
+        'rest_of_season': args.rest_of_season,
+    }
+    with metrics.profiling():
+        if args.leagues:
+            leagues = [dict(league, mode=league['mode'] or args.mode) for league in generate_report.load_leagues(args.leagues)]
+            generate_report.generate_batch_reports(leagues, workers=args.workers or generate_report.BATCH_WORKERS)
+        else:
+            generate_report.generate_html_report(**options)
+
+if __name__ == "__main__":
+    main()
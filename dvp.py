@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import pandas as pd
+
+import gamelog
+import schema
+
+# Position groups, by the first letter of a listed position ('G-F' -> G, 'F-C' -> F).
+# Index ALL is the team-wide row, used for players without a known position.
+POSITIONS = ['G', 'F', 'C']
+ALL = len(POSITIONS)
+
+# Counting stats accumulated per (player, opponent)
+DVP_COLUMNS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FG3M', 'TOV', 'FGM', 'FGA', 'FTM', 'FTA']
+
+# Points-league scoring used to rank defenses against each position
+FANTASY_POINTS = {
+    'PTS': 1, 'FG3M': 1, 'FGM': 2, 'FGA': -1, 'FTM': 1, 'FTA': -1,
+    'REB': 1, 'AST': 2, 'STL': 4, 'BLK': 4, 'TOV': -2,
+}
+
+def store_path(season):
+    return os.path.join(gamelog.DATA_DIR, 'dvp', season + '.npz')
+
+def opponent_codes(matchups):
+    """
+    Opponent of each game-log row ('LAL vs. BOS', 'LAL @ BOS' -> BOS) as an
+    index into schema.team_abbrs(), -1 if unknown.
+    """
+    # Only the distinct matchup strings (a few thousand a season) are parsed
+    rows, matchups = pd.factorize(np.asarray(matchups, dtype=object))
+    opponents = pd.Series(matchups, dtype=object).astype(str).str.split().str[-1]
+    codes = pd.Categorical(opponents, categories=schema.team_abbrs()).codes.astype(np.int64)
+    return codes[rows] if len(codes) else np.full(len(rows), -1, dtype=np.int64)
+
+def _empty():
+    n_teams = len(schema.team_abbrs())
+    return np.array([], dtype=np.int64), np.zeros((0, n_teams, len(DVP_COLUMNS))), np.zeros(n_teams, dtype=np.int64)
+
+def _fold(logs, player_ids, sums, team_games):
+    """
+    Adds game-log rows to the (player x opponent x category) sums and the
+    per-team games defended. Returns new (player_ids, sums, team_games).
+    """
+    opp = opponent_codes(logs['MATCHUP'].to_numpy())
+    keep = opp >= 0
+    opp = opp[keep]
+    ids = logs['PLAYER_ID'].to_numpy().astype(np.int64)[keep]
+    n_teams = len(schema.team_abbrs())
+
+    # Grow the player axis with players seen for the first time
+    all_ids = np.union1d(player_ids, ids)
+    grown = np.zeros((len(all_ids), n_teams, len(DVP_COLUMNS)))
+    grown[np.searchsorted(all_ids, player_ids)] = sums
+
+    flat = np.searchsorted(all_ids, ids) * n_teams + opp
+    values = logs[DVP_COLUMNS].to_numpy(dtype=np.float64)[keep]
+    size = len(all_ids) * n_teams
+    for k in range(len(DVP_COLUMNS)):
+        grown[..., k] += np.bincount(flat, weights=values[:, k], minlength=size).reshape(len(all_ids), n_teams)
+
+    # One defended game per (game, opponent) pair
+    games = pd.DataFrame({'g': logs['GAME_ID'].to_numpy()[keep], 'o': opp}).drop_duplicates()
+    team_games = team_games + np.bincount(games['o'].to_numpy(), minlength=n_teams)
+    return all_ids, grown, team_games
+
+def _load(season):
+    """Returns the stored (player_ids, sums, team_games, through date) of a season."""
+    try:
+        with np.load(store_path(season)) as npz:
+            if list(npz['teams']) != schema.team_abbrs():
+                raise ValueError('team axis changed')
+            return npz['player_ids'], npz['sums'], npz['team_games'], str(npz['through'])
+    except (OSError, KeyError, ValueError):
+        return _empty() + ('',)
+
+def _save(season, player_ids, sums, team_games, through):
+    path = store_path(season)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, player_ids=player_ids, sums=sums, team_games=team_games,
+                 through=np.array(through), teams=np.array(schema.team_abbrs()))
+    os.replace(tmp, path)
+
+def _load_logs(season, first, last):
+    return gamelog.load_games(season, pd.Timestamp(first).date(), pd.Timestamp(last).date(),
+                              columns=['PLAYER_ID', 'GAME_ID', 'MATCHUP'] + DVP_COLUMNS)
+
+def update(season, positions=None):
+    """
+    Brings the season's DvP store up to date with the game-log store and
+    returns a DefenseVsPosition. Only dates not folded in yet are read.
+    The most recent date can still be rewritten by the next sync (late games),
+    so it is added on the fly but never persisted.
+    """
+    dates = gamelog.partition_dates(season)
+    player_ids, sums, team_games, through = _load(season)
+    if dates and through > dates[-1]:
+        player_ids, sums, team_games, through = _empty() + ('',) # Store rebuilt since
+
+    pending = [d for d in dates[:-1] if d > through]
+    if pending:
+        player_ids, sums, team_games = _fold(_load_logs(season, pending[0], pending[-1]), player_ids, sums, team_games)
+        _save(season, player_ids, sums, team_games, pending[-1])
+    if dates:
+        player_ids, sums, team_games = _fold(_load_logs(season, dates[-1], dates[-1]), player_ids, sums, team_games)
+    return DefenseVsPosition(player_ids, sums, team_games, positions)
+
+class DefenseVsPosition:
+    """
+    Per-game stats and fantasy points each team allows to each position group.
+
+    The store keeps (player x opponent x category) sums, so positions are only
+    applied here: a one-hot (players x positions) product turns them into the
+    (teams x positions x categories) matrix. Teams are on the schema.team_abbrs()
+    axis; the last position is team-wide (every player counts).
+    """
+    def __init__(self, player_ids, sums, team_games, positions=None):
+        self.positions = positions or {}
+        self.team_index = {abbr: i for i, abbr in enumerate(schema.team_abbrs())}
+        self.team_games = np.asarray(team_games)
+
+        codes = self.position_codes(player_ids)
+        onehot = np.zeros((len(player_ids), ALL + 1))
+        onehot[np.arange(len(player_ids)), codes] = 1
+        onehot[:, ALL] = 1
+        totals = np.einsum('pk,ptc->tkc', onehot, sums)
+        played = self.team_games > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.allowed = np.where(played[:, None, None], totals / self.team_games[:, None, None], np.nan)
+
+        weights = np.array([FANTASY_POINTS.get(c, 0) for c in DVP_COLUMNS], dtype=np.float64)
+        self.fantasy_points = self.allowed @ weights # teams x positions
+
+        # Rank 1 = fewest fantasy points allowed (toughest), 0 = no games yet
+        order = np.argsort(np.where(played[:, None], self.fantasy_points, np.inf), axis=0, kind='stable')
+        self.rank = np.argsort(order, axis=0) + 1
+        self.rank[~played] = 0
+
+    @property
+    def has_data(self):
+        return bool((self.team_games > 0).any())
+
+    def position_codes(self, player_ids):
+        """Position group index (ALL if unknown) for each player id, from the listed position's first letter."""
+        listed = pd.Series(np.asarray(player_ids, dtype=np.int64)).map(self.positions).fillna('').astype(str)
+        letters = listed.str.strip().str[:1].str.upper()
+        letters = letters.where(letters.isin(POSITIONS)) # Other letters (and '') are unknown
+        codes = pd.Categorical(letters, categories=POSITIONS).codes.astype(np.int64)
+        return np.where(codes < 0, ALL, codes)
+
+    def rank_of(self, abbr, position):
+        """Rank of a team's defense against a position group, 0 if unknown."""
+        row = self.team_index.get(abbr)
+        return 0 if row is None else int(self.rank[row, position])
+
+    def aligned(self, abbrs, values):
+        """
+        Rows of a (teams x ...) array reordered to another team axis (e.g. a
+        ScheduleIndex's team_abbrs). Unknown teams get NaN.
+        """
+        out = np.full((len(abbrs),) + values.shape[1:], np.nan)
+        for i, abbr in enumerate(abbrs):
+            row = self.team_index.get(abbr)
+            if row is not None:
+                out[i] = values[row]
+        return out
+
+    def factors(self, abbrs, strength=1.0):
+        """
+        Per-game multiplier for facing each team in abbrs, per position group
+        (positions x teams): fantasy points allowed to that position relative
+        to the league average. NaN where a team has no games yet.
+        """
+        fp = self.aligned(abbrs, self.fantasy_points)
+        played = self.team_games > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(self.fantasy_points[played], axis=0) / played.sum()
+            return (1 + strength * (fp / mean[None, :] - 1)).T
@@ -0,0 +1,62 @@
+import numpy as np
+from functools import lru_cache
+from itertools import repeat
+
+import schema
+import utils
+
+# Display formatting for the report tables. Frames keep raw numbers (sorting
+# reads them directly); display strings are made here a whole column at a
+# time. Numbers go through one bound %-format mapped over the column (several
+# times faster than np.char.mod, which wraps the same call in more overhead),
+# and rows are joined once at the end instead of growing a string per column.
+
+BADGE_STYLE = "padding: 4px; border-radius: 4px; text-align:center; font-weight:bold;"
+
+def text(values):
+    """Column as an object array of str, ready for vectorized concatenation."""
+    return np.asarray(values, dtype=object).astype(str).astype(object)
+
+def player_cells(names, teams):
+    """Player column: bold name over the team abbreviation."""
+    return "<b>" + text(names) + "</b> <br><span style='color:#888'>" + text(teams) + "</span>"
+
+# Missing numbers (NaN, e.g. no RANK without games in a period) show as '-' and sort lowest
+MISSING = '-'
+MISSING_SORT_KEY = '-1e308'
+
+def fixed(values, decimals=1, suffix=''):
+    """
+    Numbers as strings with a fixed number of decimals (float32 storage noise
+    rounded away first, see schema.widen), e.g. fixed(x, 1, '%') -> '45.3%'.
+    """
+    fmt = f"%.{decimals}f" + suffix.replace('%', '%%')
+    values = schema.widen(values)
+    out = np.array(list(map(fmt.__mod__, values.tolist())), dtype=object)
+    out[np.isnan(values)] = MISSING
+    return out
+
+def sort_keys(values):
+    """Raw numbers as sort keys (data-order): shortest repr, storage noise rounded away."""
+    values = schema.widen(values)
+    out = np.array(list(map(repr, values.tolist())), dtype=object)
+    out[np.isnan(values)] = MISSING_SORT_KEY
+    return out
+
+def cells(fmt, *columns):
+    """One string per row from a %-format with one %s per column, e.g. "<td data-order='%s'>%s</td>"."""
+    return np.array(list(map(fmt.__mod__, zip(*columns))), dtype=object)
+
+def join_rows(columns, n, start='', end=''):
+    """Concatenates n-row string columns row by row (one join per row), each row between start and end."""
+    return np.array(list(map(''.join, zip(repeat(start, n), *columns, repeat(end, n)))), dtype=object)
+
+@lru_cache(maxsize=None)
+def badge(opp_abbr, is_home, rank, label='Def Rank'):
+    """
+    Colored matchup badge for a game against opp_abbr whose defense ranks
+    rank (1 = toughest). Only a few hundred distinct badges exist, so each
+    is built once per process.
+    """
+    prefix = 'vs' if is_home else '@'
+    return f"<div style='background-color:{utils.get_color_for_rank(rank)}; {BADGE_STYLE}' title='{label}: {rank}'>{prefix} {opp_abbr}</div>"
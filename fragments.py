@@ -0,0 +1,94 @@
+import os
+import json
+import shutil
+import filecmp
+import hashlib
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+
+# Constants
+FRAGMENT_DIR = os.environ.get('NBA_FRAGMENT_DIR', '.nba_fragments')
+
+def digest(*parts):
+    """
+    Content hash of the inputs of a fragment. Parts can be DataFrames, numpy
+    arrays, bytes, strings or anything JSON-serializable.
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(json.dumps(list(map(str, part.columns))).encode('utf-8'))
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(str((part.dtype, part.shape)).encode('utf-8'))
+            h.update(np.ascontiguousarray(part).tobytes() if part.dtype != object else json.dumps(part.tolist(), default=str).encode('utf-8'))
+        elif isinstance(part, bytes):
+            h.update(part)
+        elif isinstance(part, str):
+            h.update(part.encode('utf-8'))
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        h.update(b'\x00') # Part separator
+    return h.hexdigest()
+
+def source_digest(*paths):
+    """Hash of source files, so fragments are invalidated when the rendering code changes."""
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def _path(key):
+    return os.path.join(FRAGMENT_DIR, key + '.html')
+
+def exists(key):
+    return os.path.exists(_path(key))
+
+@contextmanager
+def writer(key):
+    """
+    Opens a new fragment for writing; it is only stored if the block completes.
+    """
+    os.makedirs(FRAGMENT_DIR, exist_ok=True)
+    tmp = _path(key) + f'.{os.getpid()}.tmp' # Batch workers may render the same fragment at once
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(tmp, _path(key))
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def copy_to(key, out):
+    """Streams a stored fragment into the file object out."""
+    with open(_path(key), 'r', encoding='utf-8') as f:
+        shutil.copyfileobj(f, out)
+
+def prune(keep):
+    """
+    Deletes every stored fragment not in keep (the keys used by this run),
+    so the store only ever holds one report's worth of fragments.
+    """
+    try:
+        names = os.listdir(FRAGMENT_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith('.html') and name[:-5] not in keep:
+            try:
+                os.remove(os.path.join(FRAGMENT_DIR, name))
+            except OSError:
+                pass
+
+def replace_if_changed(tmp, target):
+    """
+    Moves tmp over target unless both have the same content, in which case
+    target (and its mtime) is left alone. Returns True if target was rewritten.
+    """
+    if os.path.exists(target) and filecmp.cmp(tmp, target, shallow=False):
+        os.remove(tmp)
+        return False
+    os.replace(tmp, target)
+    return True
@@ -0,0 +1,139 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Constants
+DATA_DIR = os.environ.get('NBA_DATA_DIR', '.nba_data')
+
+# Columns kept per player-game. Counting stats are stored as totals so any
+# window can be re-aggregated exactly (percentages from makes/attempts).
+LOG_COLUMNS = [
+    'PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_ID', 'GAME_DATE', 'MATCHUP',
+    'MIN', 'FGM', 'FGA', 'FG3M', 'FTM', 'FTA', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PTS'
+]
+
+def season_dir(season):
+    return os.path.join(DATA_DIR, 'gamelogs', season)
+
+def partition_dates(season):
+    """
+    Returns the sorted game dates (as 'YYYY-MM-DD' strings) stored for a season.
+    """
+    try:
+        names = os.listdir(season_dir(season))
+    except OSError:
+        return []
+    return sorted(n[:-4] for n in names if n.endswith('.npz'))
+
+def last_synced_date(season):
+    dates = partition_dates(season)
+    return pd.Timestamp(dates[-1]).date() if dates else None
+
+def _to_arrays(df):
+    arrays = {}
+    for col in LOG_COLUMNS:
+        values = df[col]
+        if col == 'GAME_DATE':
+            arrays[col] = pd.to_datetime(values).values.astype('datetime64[D]')
+        elif values.dtype == object or pd.api.types.is_string_dtype(values):
+            arrays[col] = values.fillna('').astype(str).to_numpy().astype('U')
+        else:
+            arrays[col] = values.fillna(0).to_numpy()
+    return arrays
+
+def write_games(season, df):
+    """
+    Writes player-game rows to the store, one columnar partition per game date.
+    A date that is already stored is replaced as a whole (late games on the most
+    recent night); earlier partitions are never touched.
+    """
+    if df.empty:
+        return 0
+    path = season_dir(season)
+    os.makedirs(path, exist_ok=True)
+
+    df = df[LOG_COLUMNS].copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE']).dt.strftime('%Y-%m-%d')
+    for game_date, rows in df.groupby('GAME_DATE'):
+        target = os.path.join(path, game_date + '.npz')
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **_to_arrays(rows))
+        os.replace(tmp, target)
+    return df['GAME_DATE'].nunique()
+
+def load_games(season, date_from=None, date_to=None, columns=None):
+    """
+    Loads stored player-game rows for a season, optionally limited to a date
+    range (inclusive) and a subset of columns. Only matching partitions are read.
+    """
+    columns = columns or LOG_COLUMNS
+    lo = date_from.isoformat() if date_from else ''
+    hi = date_to.isoformat() if date_to else '9999-12-31'
+
+    parts = []
+    for game_date in partition_dates(season):
+        if not (lo <= game_date <= hi):
+            continue
+        with np.load(os.path.join(season_dir(season), game_date + '.npz')) as npz:
+            parts.append({c: npz[c] for c in columns})
+
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame({c: np.concatenate([p[c] for p in parts]) for c in columns})
+
+# The season schedule (every regular-season game, two team rows each) is kept
+# next to the game logs as one columnar file, .nba_data/schedules/<season>.npz.
+# It is only rewritten when its content changes; its mtime marks the last check.
+SCHEDULE_COLUMNS = ['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP']
+
+def schedule_path(season):
+    return os.path.join(DATA_DIR, 'schedules', season + '.npz')
+
+def schedule_age(season):
+    """Seconds since the stored season schedule was last written or checked (None if missing)."""
+    try:
+        return time.time() - os.path.getmtime(schedule_path(season))
+    except OSError:
+        return None
+
+def load_schedule(season):
+    """Loads the stored season schedule (empty DataFrame if there is none)."""
+    try:
+        with np.load(schedule_path(season)) as npz:
+            return pd.DataFrame({c: npz[c] for c in SCHEDULE_COLUMNS})
+    except (OSError, ValueError, KeyError):
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS)
+
+def write_schedule(season, df):
+    """
+    Stores the season schedule. When the stored one has the same rows it is
+    kept and only marked as checked. Returns True if the content changed.
+    """
+    arrays = {}
+    for col in SCHEDULE_COLUMNS:
+        values = df[col]
+        if col == 'GAME_DATE':
+            arrays[col] = pd.to_datetime(values).values.astype('datetime64[D]')
+        elif col == 'TEAM_ID':
+            arrays[col] = values.to_numpy(dtype=np.int64)
+        else:
+            arrays[col] = values.astype(str).to_numpy().astype('U')
+
+    path = schedule_path(season)
+    try:
+        with np.load(path) as npz:
+            unchanged = all(np.array_equal(npz[c], arrays[c]) for c in SCHEDULE_COLUMNS)
+    except (OSError, ValueError, KeyError):
+        unchanged = False
+    if unchanged:
+        os.utime(path)
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return True
@@ -1,16 +1,653 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 import utils
-import webbrowser
+import metrics
+import fragments
+import schema
+import valuation
+import projection
+import planner
+import dvp
+import archive
+import formatting
+import artifacts
 import os
+import io
 import json
+import pickle
 
-def generate_html_report():
-    print("Initializing Fantasy NBA Report Generator V2...")
-    
-    # 1. Define Date Ranges
-    # 1. Define Date Ranges
-    today = datetime.now().date()
+# Report defaults (cli.py exposes them as flags)
+OUTPUT_FILE = "fantasy_nba_report_v2.html"
+REPORT_WEEKS = 4
+# Rest-of-season reports mark the last this-many fantasy weeks of the regular season as playoff weeks
+PLAYOFF_WEEKS = int(os.environ.get('NBA_PLAYOFF_WEEKS', '3'))
+# Opening the report needs a desktop session; CI runners have none
+OPEN_BROWSER = os.environ.get('NBA_OPEN_BROWSER', '0' if os.environ.get('CI') else '1') not in ('', '0')
+# Batch mode renders league reports in this many processes (default: one per CPU)
+BATCH_WORKERS = int(os.environ.get('NBA_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+
+def get_badge_html(opp_abbr, is_home, def_ratings, dvp_table=None, position=dvp.ALL):
+    """
+    Returns the colored matchup badge for a game against opp_abbr.
+    With a dvp_table and a position group, the color is opp_abbr's rank against
+    that position (team-wide defensive rank if it has none yet).
+    """
+    def_info = def_ratings.get(opp_abbr, {'Rank': 15})
+    rank = def_info['Rank']
+    label = 'Def Rank'
+    if dvp_table is not None and position != dvp.ALL and dvp_table.rank_of(opp_abbr, position):
+        rank = dvp_table.rank_of(opp_abbr, position)
+        label = f'Def Rank vs {dvp.POSITIONS[position]}'
+    return formatting.badge(opp_abbr, bool(is_home), int(rank), label)
+
+def matchup_badges(schedule_index, def_ratings, dvp_table=None):
+    """
+    Badge HTML for every (opponent, away/home, position group) on the
+    schedule_index team axis, as a (teams + 1, 2, positions) array whose extra
+    last row (picked by opp == -1, no game that day) is empty. Grid cells are
+    then O(1) gathers from it.
+    """
+    badges = np.empty((len(schedule_index.team_abbrs) + 1, 2, dvp.ALL + 1), dtype=object)
+    badges[-1] = ""
+    for t, abbr in enumerate(schedule_index.team_abbrs):
+        for home in (0, 1):
+            for pos in range(dvp.ALL + 1):
+                badges[t, home, pos] = get_badge_html(abbr, bool(home), def_ratings, dvp_table, pos)
+    return badges
+
+@metrics.timed('build_player_frame', rows=len)
+def build_player_frame(stats_dict, periods):
+    """
+    Builds the player side of the report once: Season stats merged with every
+    other period (columns suffixed _<period>), plus the Player display column.
+    Stats stay numeric (FG_PCT, not '45.3%'); cells are formatted when rendered.
+    The result is shared by all week tabs; only schedule columns change per week.
+    """
+    # Base: Season Stats
+    base_df = stats_dict['Season'].copy()
+    base_df = base_df[base_df['GP'] > 0] # Active only
+
+    # Merge the other periods (L7, L14, ...) with a period suffix, on PLAYER_ID
+    merged = base_df
+    for period in periods[1:]:
+        other = stats_dict[period].copy().add_suffix(f'_{period}')
+        merged = pd.merge(merged, other, left_on='PLAYER_ID', right_on=f'PLAYER_ID_{period}', how='left')
+
+    # Format Player
+    merged['Player'] = formatting.player_cells(merged['PLAYER_NAME'], merged['TEAM_ABBREVIATION'])
+
+    # Display names (Season has no suffix, other periods use _<period>)
+    for period in periods:
+        sfx = '' if period == 'Season' else f'_{period}'
+        merged = merged.rename(columns={f'FG3M{sfx}': f'3PM{sfx}'})
+
+    return merged.reset_index(drop=True)
+
+@metrics.timed('process_week_grid', rows=lambda result: len(result[1]))
+def process_week_grid(start_date, end_date, schedule_index, player_rows, def_ratings, player_pos=None, dvp_table=None):
+    """
+    Builds one week: the team schedule grid and each player's schedule cells.
+    player_rows are the players' team rows in schedule_index (-1 if unknown),
+    so the per-week work is a gather over the week's schedule slice.
+    player_pos (position group codes) picks each player's badges against
+    their position from dvp_table; the team grid uses team-wide ranks.
+    Returns (team_df, player_sched, day_cols); player_sched holds Games and the
+    day columns, row-aligned with the player frame.
+    """
+    # Create Date Headers
+    days = []
+    curr = start_date
+    while curr <= end_date:
+        days.append(curr)
+        curr += timedelta(days=1)
+
+    day_cols = [d.strftime('%a (%m/%d)') for d in days]
+
+    # --- TEAM SCHEDULE GRID ---
+    # Sliced straight out of the season schedule index (no per-week filtering)
+    lo = schedule_index.day_index(start_date)
+    hi = schedule_index.day_index(end_date + timedelta(days=1))
+    games = schedule_index.games_between(start_date, end_date)
+    active = np.flatnonzero(games)
+
+    # Badge HTML rendered once per (opponent, away/home, position)
+    badges = matchup_badges(schedule_index, def_ratings, dvp_table)
+    opp = schedule_index.opp[:, lo:hi]
+    home = schedule_index.home[:, lo:hi].astype(int)
+    grid = badges[opp, home, dvp.ALL]
+
+    team_df = pd.DataFrame()
+    if len(active):
+        team_df = pd.DataFrame(grid[active], columns=day_cols)
+        team_df.insert(0, 'TEAM_ID', schedule_index.team_ids[active])
+        team_df.insert(1, 'Team', schedule_index.team_abbrs[active])
+        team_df.insert(2, 'Games', games[active])
+        team_df.insert(3, 'Off-Nights', schedule_index.light_slate_games(start_date, end_date)[active])
+        team_df.insert(4, 'B2B', schedule_index.back_to_backs(start_date, end_date)[active])
+        team_df = team_df.sort_values(['Games', 'Off-Nights', 'Team'], ascending=[False, False, True])
+
+    # --- PLAYER SCHEDULE ---
+    # Each player's badges against their position; teams idle all week (and
+    # unknown teams, the extra last row) show '-'
+    opp = np.vstack([opp, np.full((1, len(day_cols)), -1, dtype=opp.dtype)])
+    home = np.vstack([home, np.zeros((1, len(day_cols)), dtype=int)])
+    games = np.append(games, 0)
+    if player_pos is None:
+        player_pos = np.full(len(player_rows), dvp.ALL)
+    cells = badges[opp[player_rows], home[player_rows], np.asarray(player_pos)[:, None]]
+    cells[games[player_rows] == 0] = '-'
+
+    player_sched = pd.DataFrame(cells, columns=day_cols)
+    player_sched.insert(0, 'Games', games[player_rows])
+
+    return team_df, player_sched, day_cols
+
+# Stat Columns Definition
+STAT_METRICS = ['MIN', 'PTS', 'REB', 'AST', '3PM', 'STL', 'BLK', 'FG%', 'FT%', 'VALUE', 'RANK'] # VALUE: 9-cat z-score total, RANK: its rank
+# Decimals shown per stat column (default 1)
+METRIC_DECIMALS = {'RANK': 0}
+
+PROJ_TITLE = "Projected 9-cat value this week: per-game stats x games, adjusted for opponent defense"
+
+# Player rows are rendered and written in chunks so memory stays flat
+ROW_CHUNK = 1000
+
+def td(values, attrs=""):
+    """
+    Wraps an array of cell contents in <td> tags (vectorized over the array).
+    """
+    return formatting.cells(f"<td{attrs}>%s</td>", np.asarray(values, dtype=object))
+
+@metrics.timed('build_stat_cells', rows=len)
+def build_stat_cells(player_df, periods, stat_metrics=STAT_METRICS):
+    """
+    Pre-renders the stat cells of every period for every player, one string per row.
+    They do not depend on the week, so this runs once per report. Sort keys
+    are the raw numbers (FG% from FG_PCT), never parsed back from display text.
+    """
+    n = len(player_df)
+    columns = []
+    for p in periods:
+        sfx = '' if p == 'Season' else f'_{p}'
+        style = '' if p == 'Season' else 'display:none'
+        cell = f"<td class='stat-{p.lower()}' style='{style}' data-order='%s'>%s</td>"
+        for m in stat_metrics:
+            pct = m.endswith('%')
+            col = player_df.get(f"{m[:2]}_PCT{sfx}" if pct else f"{m}{sfx}")
+            if col is None:
+                columns.append(np.full(n, cell % ('0', '0'), dtype=object))
+                continue
+            values = col.to_numpy()
+            if values.dtype.kind != 'f':
+                values = values.astype(float)
+            if pct:
+                values = values * 100
+            columns.append(formatting.cells(cell, formatting.sort_keys(values), formatting.fixed(values, METRIC_DECIMALS.get(m, 1), '%' if pct else '')))
+    return formatting.join_rows(columns, n)
+
+@metrics.timed('generate_html')
+def generate_html(out, team_df, player_df, player_sched, stat_cells, day_cols, table_id_suffix, periods, projected=None,
+                  stat_metrics=STAT_METRICS):
+    """
+    Streams one week tab to the file object out: the team schedule table and the player table.
+    player_df comes from build_player_frame, stat_cells from build_stat_cells, and
+    player_sched (Games + day columns, row-aligned with player_df) from process_week_grid.
+    projected holds each player's projected value for the week (Proj column, 0 if None);
+    stat_metrics are the stat columns of each period, as in stat_cells.
+    Rows are assembled from column arrays and written chunk by chunk.
+    """
+    if player_df.empty:
+        out.write("<p>No data.</p>")
+        return
+    metrics.add(rows=len(player_df))
+
+    # --- Team Table HTML ---
+    if not team_df.empty:
+        out.write(f"""
+        <div class="team-section">
+            <h3>Team Schedule (Click to Filter Players)</h3>
+            <table id="teamTable{table_id_suffix}" class="display compact" style="width:100%">
+                <thead>
+                    <tr>
+                        <th>Team</th>
+                        <th>Games</th>
+                        <th title="Games on nights with {utils.LIGHT_SLATE_MAX_GAMES} or fewer NBA games">Off-Nights</th>
+                        <th title="Back-to-back sets">B2B</th>
+                        {''.join([f'<th>{d}</th>' for d in day_cols])}
+                    </tr>
+                </thead>
+                <tbody>
+        """)
+        teams = team_df['Team'].to_numpy(dtype=object)
+        rows = ("<tr class='team-row' data-team='" + teams + "' onclick='filterTeam(this, \"" + teams + f"\", \"{table_id_suffix}\")'>"
+                + "<td><b>" + teams + "</b></td>" + td(team_df['Games']) + td(team_df['Off-Nights']) + td(team_df['B2B']))
+        for d in day_cols:
+            rows = rows + td(team_df[d])
+        out.writelines(rows + "</tr>")
+        out.write("</tbody></table></div>")
+
+    out.write("<hr>")
+
+    # --- Player Table HTML ---
+    # Columns: Player, Team, Games, [Days], [Stats per period]
+
+    # Period buttons and header groups (built outside the f-string to avoid backslash errors in Python < 3.12)
+    period_buttons = period_buttons_html(periods, table_id_suffix)
+    stat_headers = ""
+    for p in periods:
+        hidden = "" if p == "Season" else ' style="display:none"'
+        stat_headers += ''.join([f'<th class="stat-{p.lower()}"{hidden}>{m}</th>' for m in stat_metrics])
+
+    out.write(f"""
+    <div class="player-section">
+        <div class="controls">
+            {period_buttons}
+            <button class="btn-reset" onclick="resetTeamFilter('{table_id_suffix}')">Show All Teams</button>
+        </div>
+        <table id="playerTable{table_id_suffix}" class="display" style="width:100%">
+            <thead>
+                <tr>
+                    <th>Player</th>
+                    <th>Team</th> <!-- Hidden column for filtering -->
+                    <th>Games</th>
+                    <th title="{PROJ_TITLE}">Proj</th>
+                    {''.join([f'<th>{d}</th>' for d in day_cols])}
+                    <!-- Stats Headers, one group per period (Season visible) -->
+                    {stat_headers}
+                </tr>
+            </thead>
+            <tbody>
+    """)
+
+    players = player_df['Player'].to_numpy(dtype=object)
+    team_abbrs = player_df['TEAM_ABBREVIATION'].to_numpy(dtype=object)
+    games = player_sched['Games'].to_numpy()
+    projected = np.zeros(len(player_df)) if projected is None else np.asarray(projected, dtype=np.float64)
+    proj_cells = td(formatting.fixed(np.nan_to_num(projected)))
+    day_cells = player_sched[day_cols].to_numpy(dtype=object)
+    for start in range(0, len(player_df), ROW_CHUNK):
+        chunk = slice(start, start + ROW_CHUNK)
+        columns = [td(players[chunk]), td(team_abbrs[chunk]), td(games[chunk]), proj_cells[chunk]] # Team column is hidden
+        columns += [td(day_cells[chunk, j]) for j in range(len(day_cols))]
+        columns.append(stat_cells[chunk])
+        out.writelines(formatting.join_rows(columns, len(players[chunk]), "<tr>", "</tr>"))
+
+    out.write("</tbody></table></div>")
+
+def period_buttons_html(periods, table_id_suffix):
+    """
+    Returns the period switch buttons of a week tab (Season active).
+    """
+    buttons = ""
+    for p in periods:
+        active = " active" if p == "Season" else ""
+        buttons += f'<button class="btn-stat{active}" data-period="{p}" onclick="switchStats(\'{p}\', \'{table_id_suffix}\')">{utils.STAT_PERIODS[p][0]}</button>\n'
+    return buttons
+
+def json_numbers(values, scale=1):
+    """
+    Returns a column as a list of numbers rounded to 1 decimal, None where missing.
+    """
+    if values is None:
+        return []
+    values = (pd.Series(schema.widen(pd.to_numeric(values, errors='coerce'))) * scale).round(1)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+@metrics.timed('build_report_payload')
+def build_report_payload(player_df, schedule_index, weeks, def_ratings, periods, projected=None, dvp_table=None,
+                         stat_metrics=STAT_METRICS):
+    """
+    Collects the data of every week tab as one compact, columnar JSON-ready dict:
+    player stats once per period and metric, and per-week schedule arrays over
+    the team axis of schedule_index. The page renders the tables from it.
+    projected maps week ids to the players' projected values for that week.
+    With a dvp_table, teams carry their rank against each position group and
+    players their group (POS), so player badges are position-specific.
+    """
+    projected = projected or {}
+    teams = schedule_index.team_abbrs.tolist()
+    ranks = [def_ratings.get(abbr, {'Rank': 15})['Rank'] for abbr in teams]
+    pos_ranks = [[(dvp_table.rank_of(abbr, pos) if dvp_table is not None else 0) or rank for abbr, rank in zip(teams, ranks)]
+                 for pos in range(len(dvp.POSITIONS))]
+    payload = {
+        'periods': periods,
+        'metrics': stat_metrics,
+        'decimals': [METRIC_DECIMALS.get(m, 1) for m in stat_metrics],
+        'teams': {
+            'abbr': teams,
+            'rank': [int(r) for r in ranks],
+            'color': [utils.get_color_for_rank(r) for r in ranks],
+            'posRank': [[int(r) for r in pr] for pr in pos_ranks],
+            'posColor': [[utils.get_color_for_rank(r) for r in pr] for pr in pos_ranks],
+        },
+        'positions': dvp.POSITIONS,
+        'players': {
+            'name': player_df['PLAYER_NAME'].tolist(),
+            'team': player_df['TEAM_ABBREVIATION'].tolist(),
+            'teamRow': schedule_index.team_rows(player_df['TEAM_ABBREVIATION']).tolist(),
+            'pos': projection.position_rows(player_df).tolist(),
+        },
+        'stats': {},
+        'weeks': [],
+    }
+
+    for p in periods:
+        sfx = '' if p == 'Season' else f'_{p}'
+        payload['stats'][p] = {
+            m: json_numbers(player_df.get(f"{m[:2]}_PCT{sfx}"), 100) if m.endswith('%') else json_numbers(player_df.get(f"{m}{sfx}"))
+            for m in stat_metrics
+        }
+
+    for w in weeks:
+        lo = schedule_index.day_index(w['start'])
+        hi = schedule_index.day_index(w['end'] + timedelta(days=1))
+        payload['weeks'].append({
+            'games': schedule_index.games_between(w['start'], w['end']).tolist(),
+            'offNights': schedule_index.light_slate_games(w['start'], w['end']).tolist(),
+            'b2b': schedule_index.back_to_backs(w['start'], w['end']).tolist(),
+            'opp': schedule_index.opp[:, lo:hi].tolist(),
+            'home': schedule_index.home[:, lo:hi].astype(int).tolist(),
+            'proj': json_numbers(projected.get(w['id'], np.zeros(len(player_df)))),
+        })
+    return payload
+
+def generate_week_shell(out, day_cols, table_id_suffix, periods, stat_metrics=STAT_METRICS):
+    """
+    Writes the empty tables of one week tab for the JSON output mode.
+    Rows are rendered in the browser from the report payload.
+    """
+    out.write(f"""
+        <div class="team-section">
+            <h3>Team Schedule (Click to Filter Players)</h3>
+            <table id="teamTable{table_id_suffix}" class="display compact" style="width:100%">
+                <thead>
+                    <tr>
+                        <th>Team</th>
+                        <th>Games</th>
+                        <th title="Games on nights with {utils.LIGHT_SLATE_MAX_GAMES} or fewer NBA games">Off-Nights</th>
+                        <th title="Back-to-back sets">B2B</th>
+                        {''.join([f'<th>{d}</th>' for d in day_cols])}
+                    </tr>
+                </thead>
+            </table>
+        </div>
+        <hr>
+        <div class="player-section">
+            <div class="controls">
+                {period_buttons_html(periods, table_id_suffix)}
+                <button class="btn-reset" onclick="resetTeamFilter('{table_id_suffix}')">Show All Teams</button>
+            </div>
+            <table id="playerTable{table_id_suffix}" class="display" style="width:100%">
+                <thead>
+                    <tr>
+                        <th>Player</th>
+                        <th>Team</th>
+                        <th>Games</th>
+                        <th title="{PROJ_TITLE}">Proj</th>
+                        {''.join([f'<th>{d}</th>' for d in day_cols])}
+                        {''.join([f'<th>{m}</th>' for m in stat_metrics])}
+                    </tr>
+                </thead>
+            </table>
+        </div>
+    """)
+
+# Client-side renderer for the JSON output mode. Tables are built from the
+# #report-data payload with deferRender, and only the active period's stat
+# columns exist: switching periods re-reads the cells instead of toggling CSS.
+JSON_MODE_SCRIPT = """
+            var REPORT = null;
+            var activePeriod = {};
+
+            $(document).ready( function () {
+                REPORT = JSON.parse(document.getElementById('report-data').textContent);
+                REPORT.weeks.forEach(function (week, i) { initWeek(week, 'W' + (i + 1)); });
+
+                // Open default tab
+                document.getElementById("defaultOpen").click();
+            });
+
+            // pos: the player's position group (team-wide rank if undefined or unknown)
+            function badgeHtml(opp, home, pos) {
+                var t = REPORT.teams;
+                var byPos = pos !== undefined && pos < REPORT.positions.length;
+                var color = byPos ? t.posColor[pos][opp] : t.color[opp];
+                var title = byPos ? 'Def Rank vs ' + REPORT.positions[pos] + ': ' + t.posRank[pos][opp] : 'Def Rank: ' + t.rank[opp];
+                return "<div style='background-color:" + color + "; padding: 4px; border-radius: 4px; text-align:center; font-weight:bold;' title='" + title + "'>" + (home ? 'vs' : '@') + " " + t.abbr[opp] + "</div>";
+            }
+
+            function dayCell(week, team, d, pos) {
+                if (team < 0 || !week.games[team]) return '-';
+                var opp = week.opp[team][d];
+                return opp < 0 ? '' : badgeHtml(opp, week.home[team][d], pos);
+            }
+
+            function initWeek(week, suffix) {
+                var P = REPORT.players;
+                var nDays = week.opp.length ? week.opp[0].length : 0;
+                activePeriod[suffix] = REPORT.periods[0];
+
+                // Team table: teams playing this week
+                var teamData = [];
+                REPORT.teams.abbr.forEach(function (abbr, t) {
+                    if (!week.games[t]) return;
+                    var row = ['<b>' + abbr + '</b>', week.games[t], week.offNights[t], week.b2b[t]];
+                    for (var d = 0; d < nDays; d++) row.push(dayCell(week, t, d));
+                    row.team = abbr;
+                    teamData.push(row);
+                });
+                $('#teamTable' + suffix).DataTable({
+                    "data": teamData, "paging": false, "info": false, "searching": false,
+                    "createdRow": function (tr, data) {
+                        $(tr).addClass('team-row').attr('data-team', data.team)
+                            .on('click', function () { filterTeam(this, data.team, suffix); });
+                    }
+                });
+
+                // Player table: row data is the player's index in the payload
+                var columns = [
+                    { "data": function (j) { return '<b>' + P.name[j] + "</b> <br><span style='color:#888'>" + P.team[j] + '</span>'; } },
+                    { "data": function (j) { return P.team[j]; }, "visible": false },
+                    { "data": function (j) { return P.teamRow[j] < 0 ? 0 : week.games[P.teamRow[j]]; } },
+                    { "data": function (j, type) { var v = week.proj[j] || 0; return type == 'display' ? v.toFixed(1) : v; } }
+                ];
+                for (var d = 0; d < nDays; d++) {
+                    (function (d) {
+                        columns.push({ "data": function (j) { return dayCell(week, P.teamRow[j], d, P.pos[j]); } });
+                    })(d);
+                }
+                REPORT.metrics.forEach(function (m, i) {
+                    var pct = m.slice(-1) == '%';
+                    var decimals = REPORT.decimals ? REPORT.decimals[i] : 1;
+                    columns.push({ "data": function (j, type) {
+                        var v = REPORT.stats[activePeriod[suffix]][m][j];
+                        if (type != 'display') return v === null ? -Infinity : v;
+                        return v === null ? '-' : v.toFixed(decimals) + (pct ? '%' : '');
+                    } });
+                });
+                var rows = P.name.map(function (_, j) { return j; });
+                tables[suffix] = $('#playerTable' + suffix).DataTable({
+                    "data": rows, "columns": columns, "deferRender": true, "order": [[ 2, "desc" ]], "pageLength": 25
+                });
+            }
+
+            // --- Feature: Switch Stats ---
+            function switchStats(period, suffix) {
+                var btns = document.querySelectorAll('#Week' + suffix.replace('W','') + ' .controls .btn-stat');
+                for (var i = 0; i < btns.length; i++) {
+                    btns[i].classList.toggle('active', btns[i].dataset.period == period);
+                }
+                activePeriod[suffix] = period;
+                tables[suffix].rows().invalidate('data').draw(false);
+            }
+"""
+
+# Client side of the split output mode: week tabs are separate files (see
+# artifacts.py), fetched the first time their tab is opened; their DataTables
+# are only initialized then, so first paint does not grow with the horizon.
+SPLIT_MODE_SCRIPT = """
+            var loadedWeeks = {};
+
+            $(document).ready( function () {
+                // Open default tab (which loads its week)
+                document.getElementById("defaultOpen").click();
+            });
+
+            function loadWeek(weekName) {
+                if (loadedWeeks[weekName]) return;
+                loadedWeeks[weekName] = true;
+                var div = document.getElementById(weekName);
+                var suffix = 'W' + weekName.replace('Week', '');
+                div.innerHTML = "<p>Loading...</p>";
+                fetch(div.dataset.src).then(function (response) {
+                    if (!response.ok) throw new Error('HTTP ' + response.status);
+                    return response.text();
+                }).then(function (html) {
+                    div.innerHTML = html;
+                    tables[suffix] = $('#playerTable' + suffix).DataTable({ "order": [[ 2, "desc" ]], "pageLength": 25 });
+                    $('#teamTable' + suffix).DataTable({ "paging": false, "info": false, "searching": false });
+                }).catch(function (err) {
+                    loadedWeeks[weekName] = false; // Retried on the next click
+                    div.innerHTML = "<p>Could not load this week (" + err.message + "). Split reports are read over HTTP: serve the folder, e.g. python -m http.server.</p>";
+                });
+            }
+
+"""
+
+def projection_rates(player_df, period):
+    """
+    Per-game rates of one stat period, row-aligned with player_df, in the stats
+    layout the ProjectionEngine reads (3PM back to FG3M, no period suffix).
+    Players without games in the period project to zero.
+    """
+    sfx = '' if period == 'Season' else f'_{period}'
+    rates = player_df[['PLAYER_ID', 'TEAM_ABBREVIATION'] + (['POS'] if 'POS' in player_df.columns else [])].copy()
+    for col in projection.PROJECTED_COLUMNS + ['FG_PCT', 'FT_PCT']:
+        src = f'3PM{sfx}' if col == 'FG3M' else f'{col}{sfx}'
+        if src in player_df.columns:
+            rates[col] = player_df[src].to_numpy()
+    return rates
+
+@metrics.timed('projection')
+def project_weeks(player_df, schedule_index, def_ratings, weeks, dvp_table=None,
+                  categories=valuation.CATEGORIES, punt=valuation.PUNT, period=projection.PROJECTION_PERIOD):
+    """
+    Projected 9-cat value per week tab: the period's per-game rates times
+    matchup-adjusted games (against each player's position with a dvp_table),
+    z-scored over categories against the other players' projections of the same week.
+    Returns {week id: values row-aligned with player_df}.
+    """
+    projector = projection.ProjectionEngine(schedule_index, def_ratings, weeks, dvp_table=dvp_table)
+    week_frames = projector.week_frames(projection_rates(player_df, period))
+    week_frames = valuation.ValuationEngine(week_frames, categories).apply(week_frames, punt=punt)
+    return {week_id: df['VALUE'].to_numpy() if 'VALUE' in df.columns else np.zeros(len(df)) for week_id, df in week_frames.items()}
+
+def planner_section_html(plan):
+    """
+    Returns the Streaming Plan section of a week tab: the planner's add/drop moves by day
+    (nothing when the league has no roster to plan for).
+    """
+    if plan is None:
+        return ""
+    unit = 'games' if plan['objective'] == 'games' else 'value'
+    if plan['moves']:
+        rows = ''.join([f"<tr><td>{day.strftime('%a (%m/%d)')}</td><td><b>{add}</b></td><td>{drop or '(open spot)'}</td></tr>" for day, add, drop in plan['moves']])
+        body = f"""
+            <table class="display compact" style="width:auto">
+                <thead><tr><th>Day</th><th>Add</th><th>Drop</th></tr></thead>
+                <tbody>{rows}</tbody>
+            </table>"""
+    else:
+        body = "<p>No move beats holding the current roster this week.</p>"
+    return f"""
+    <hr>
+    <div class="planner-section">
+        <h3>Streaming Plan</h3>
+        <p>Projected {unit} from the streaming spots: <b>{plan['value']:.1f}</b> (holding: {plan['baseline']:.1f})</p>
+        {body}
+    </div>
+    """
+
+def season_outlook_html(outlook, schedule_index):
+    """
+    Returns the Rest of Season tab body: games per team in every remaining
+    fantasy week with the running total, the season and playoff-week totals.
+    The cost is one cell per team and week, whatever the horizon.
+    """
+    weeks, games, n_playoff = outlook['weeks'], outlook['games'], outlook['playoff_weeks']
+    cumulative = np.cumsum(games, axis=1)
+    playoff_games = games[:, len(weeks) - n_playoff:].sum(axis=1)
+    active = np.flatnonzero(cumulative[:, -1])
+
+    columns = [
+        formatting.cells("<td><b>%s</b></td>", schedule_index.team_abbrs[active]),
+        formatting.cells("<td><b>%s</b></td>", cumulative[active, -1]),
+        formatting.cells("<td>%s</td>", playoff_games[active]),
+    ]
+    headers = ["<th>Team</th>", "<th>Games Left</th>", f"<th>Playoff Games ({n_playoff} wk)</th>"]
+    for i, w in enumerate(weeks):
+        playoff = i >= len(weeks) - n_playoff
+        style = " style='background-color:#fff3e0'" if playoff else ""
+        label = f"{'🏆 ' if playoff else ''}Wk {i + 1}<br>{w['start'].strftime('%m/%d')}"
+        headers.append(f"<th>{label}</th>")
+        columns.append(formatting.cells(f"<td data-order='%s'{style}>%s <span style='color:#888'>(%s)</span></td>",
+                                        games[active, i], games[active, i], cumulative[active, i]))
+    rows = ''.join(formatting.join_rows(columns, len(active), "<tr>", "</tr>"))
+    return f"""
+    <h3>Rest of Season</h3>
+    <p>Games per week, with the running total in parentheses. 🏆 marks the fantasy playoff weeks.</p>
+    <table id="seasonTable" class="display compact">
+        <thead><tr>{''.join(headers)}</tr></thead>
+        <tbody>{rows}</tbody>
+    </table>
+    <script>
+        $(document).ready(function() {{ $('#seasonTable').DataTable({{paging: false, info: false, order: [[1, 'desc']]}}); }});
+    </script>
+    """
+
+def week_fragment_key(schedule_index, week, table_id_suffix, base_digest, projected=None):
+    """
+    Content hash of everything a server-rendered week tab depends on: the week's
+    schedule slice and projections plus base_digest (stats snapshot, player
+    teams, defensive ratings, periods and the rendering code).
+    """
+    lo = schedule_index.day_index(week['start'])
+    hi = schedule_index.day_index(week['end'] + timedelta(days=1))
+    return fragments.digest(
+        base_digest, table_id_suffix, week['start'].isoformat(), week['end'].isoformat(),
+        schedule_index.team_abbrs, schedule_index.opp[:, lo:hi], schedule_index.home[:, lo:hi],
+        np.asarray(projected if projected is not None else [], dtype=np.float64),
+    )
+
+def build_weeks(w1_start, w1_end, n_weeks):
+    """
+    Returns the week tabs: the first runs w1_start..w1_end, then full seven-day weeks.
+    """
+    weeks = []
+    current_start = w1_start
+    current_end = w1_end
+    for i in range(n_weeks):
+        weeks.append({
+            'id': f'Week{i+1}',
+            'label': f'Week {i+1} ({current_start.strftime("%m/%d")} - {current_end.strftime("%m/%d")})',
+            'start': current_start,
+            'end': current_end,
+        })
+        
+        # Next week
+        current_start = current_end + timedelta(days=1)
+        current_end = current_start + timedelta(days=6)
+    return weeks
+
+def report_dates(today=None, n_weeks=REPORT_WEEKS, week_end=6):
+    """
+    Returns (w1_start, w1_end, final_end, season_str) for a report made on today
+    (default: the current date): week 1 runs to the next week_end day (6 = Sunday),
+    then n_weeks - 1 full weeks.
+    """
+    today = today or datetime.now().date()
     
     # FORCE 2025: If server is in 2024 (GitHub), pretend it's 2025
     if today.year == 2024:
@@ -20,12 +657,12 @@ def generate_html_report():
         except ValueError: # Handle Feb 29
             today = today + timedelta(days=365)
             
-    days_until_sunday = (6 - today.weekday()) % 7
-    w1_end = today + timedelta(days=days_until_sunday)
+    days_until_week_end = (week_end - today.weekday()) % 7
+    w1_end = today + timedelta(days=days_until_week_end)
     w1_start = today
     
-    # Calculate end date for 4 weeks
-    final_end = w1_end + timedelta(days=21) # 3 more weeks
+    # Calculate end date for n_weeks weeks
+    final_end = w1_end + timedelta(days=7 * (n_weeks - 1))
     
     # Determine Season String (e.g., "2025-26")
     # If month is >= 10 (Oct), season is Year-(Year+1)
@@ -35,257 +672,242 @@ def generate_html_report():
         season_str = f"{curr_year}-{str(curr_year+1)[-2:]}"
     else:
         season_str = f"{curr_year-1}-{str(curr_year)[-2:]}"
-        
-    print(f"Report Range: {w1_start} to {final_end}")
+
+    return w1_start, w1_end, final_end, season_str
+
+# A league's report settings; a batch config (see load_leagues) overrides any of them per league
+DEFAULT_LEAGUE = {
+    'name': 'default',
+    'output': OUTPUT_FILE,
+    'mode': None,                          # None: $REPORT_MODE, else html
+    'weeks': REPORT_WEEKS,                 # Week tabs
+    'rest_of_season': False,               # Add a games-per-week table through the end of the season
+    'playoff_weeks': PLAYOFF_WEEKS,        # Final fantasy weeks marked as playoffs in that table
+    'week_end': 6,                         # Last day of a fantasy week (0 = Monday ... 6 = Sunday)
+    'periods': list(utils.STAT_PERIODS),   # Stat period buttons, Season first
+    'categories': valuation.CATEGORIES,    # Categories of the VALUE z-score total
+    'punt': valuation.PUNT,                # Categories left out of the total
+    'metrics': STAT_METRICS,               # Stat columns shown per period
+    'roster': None,                        # Planner roster config file (default $NBA_ROSTER)
+}
+
+def fetch_report_inputs(leagues=(DEFAULT_LEAGUE,), today=None):
+    """
+    Fetch step shared by every league of a batch: schedule over the longest
+    horizon of leagues, Season/L7/L14 stats, defensive ratings and the DvP
+    table, plus the 9-cat z-scores (leagues on the default categories only
+    re-weight them). If a league wants a rest-of-season horizon, the schedule
+    is the whole stored season instead (one request a day at most, see
+    utils.sync_season_schedule). The run is archived as a dated snapshot (see archive.py).
+    """
+    horizons = [report_dates(today, league['weeks'], league['week_end']) for league in leagues]
+    w1_start, season_str = horizons[0][0], horizons[0][3]
+    final_end = max(h[2] for h in horizons)
+    full_season = any(league['rest_of_season'] for league in leagues)
+    print(f"Report Range: {w1_start} to {'end of season' if full_season else final_end}")
     print(f"Detected Season: {season_str}")
 
-    # 2. Fetch Data
-    print("Fetching Schedule...")
-    full_schedule = utils.get_schedule(w1_start, final_end, season=season_str)
-    
-    if full_schedule.empty:
+    # Schedule, Season/L7/L14 stats and defensive ratings in parallel
+    print("Fetching Schedule, Player Stats (Multi-Period) and Defensive Ratings...")
+    with metrics.stage('fetch_all'):
+        schedule, stats_dict, def_ratings, dvp_table = utils.fetch_all(w1_start, final_end, season=season_str, full_season=full_season)
+
+    if schedule.empty:
         print(f"⚠️ Warning: No games found for {season_str} in this date range.")
 
-    print("Fetching Player Stats (Multi-Period)...")
-    stats_dict = utils.get_player_stats_multi_period(season=season_str)
-    
-    print("Fetching Defensive Ratings...")
-    def_ratings = utils.get_team_defensive_ratings(season=season_str)
-
-    # 3. Process Data Helper
-    def process_week_grid(start_date, end_date, schedule_df, stats_dict, def_ratings):
-        # Create Date Headers
-        days = []
-        curr = start_date
-        while curr <= end_date:
-            days.append(curr)
-            curr += timedelta(days=1)
-            
-        day_cols = [d.strftime('%a (%m/%d)') for d in days]
-        
-        # Filter schedule
-        if schedule_df.empty:
-            week_games = pd.DataFrame(columns=['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP'])
+    # 9-cat value and rank for every player and period (NBA_PUNT drops categories from the total)
+    with metrics.stage('valuation'):
+        engine = valuation.ValuationEngine(stats_dict)
+        valued = engine.apply(stats_dict, punt=valuation.PUNT)
+
+    # Keep this run's fetched data as a dated snapshot for history queries
+    if archive.ARCHIVE_ENABLED:
+        with metrics.stage('archive'):
+            archive.write_snapshot(w1_start, schedule, valued, def_ratings)
+
+    return {
+        'today': w1_start,
+        'season': season_str,
+        'schedule': schedule,
+        'stats': stats_dict,
+        'engine': engine,
+        'valued': valued,
+        'def_ratings': def_ratings,
+        'dvp': dvp_table,
+    }
+
+def build_league_data(inputs, league=DEFAULT_LEAGUE):
+    """
+    Computes one league's report from the shared inputs (fetch_report_inputs):
+    schedule index, stats with the league's category values, player frame,
+    week tabs, projections and streaming plans. Returns a dict for write_report.
+    """
+    w1_start, w1_end, final_end, season_str = report_dates(inputs['today'], league['weeks'], league['week_end'])
+    def_ratings, dvp_table = inputs['def_ratings'], inputs['dvp']
+
+    # Rest of season: every remaining fantasy week, up to the last scheduled game
+    season_weeks = None
+    if league['rest_of_season']:
+        schedule = inputs['schedule']
+        if schedule.empty:
+            print("⚠️ Warning: No season schedule, skipping the rest-of-season table.")
         else:
-            mask = (schedule_df['GAME_DATE'] >= start_date) & (schedule_df['GAME_DATE'] <= end_date)
-            week_games = schedule_df.loc[mask].copy()
-        
-        # Helper to get badge
-        def get_badge_html(opp_abbr, is_home):
-            def_info = def_ratings.get(opp_abbr, {'Rank': 15})
-            rank = def_info['Rank']
-            color = utils.get_color_for_rank(rank)
-            prefix = 'vs' if is_home else '@'
-            return f"<div style='background-color:{color}; padding: 4px; border-radius: 4px; text-align:center; font-weight:bold;' title='Def Rank: {rank}'>{prefix} {opp_abbr}</div>"
-
-        # --- TEAM SCHEDULE GRID ---
-        team_grid_data = []
-        all_team_ids = week_games['TEAM_ID'].unique()
-        
-        for tid in all_team_ids:
-            t_games = week_games[week_games['TEAM_ID'] == tid]
-            if t_games.empty: continue
-            
-            abbr = t_games.iloc[0]['TEAM_ABBREVIATION']
-            row = {'TEAM_ID': tid, 'Team': abbr, 'Games': len(t_games)}
-            
-            for d, col_name in zip(days, day_cols):
-                g = t_games[t_games['GAME_DATE'] == d]
-                if not g.empty:
-                    matchup = g.iloc[0]['MATCHUP']
-                    opp = matchup.split(' ')[2]
-                    is_home = 'vs.' in matchup
-                    row[col_name] = get_badge_html(opp, is_home)
-                else:
-                    row[col_name] = ""
-            team_grid_data.append(row)
-            
-        team_df = pd.DataFrame(team_grid_data)
-        if not team_df.empty:
-            team_df = team_df.sort_values('Games', ascending=False)
-
-        # --- PLAYER STATS & SCHEDULE ---
-        # Base: Season Stats
-        base_df = stats_dict['Season'].copy()
-        base_df = base_df[base_df['GP'] > 0] # Active only
-        
-        # Merge L7 and L14
-        # Rename columns for L7/L14
-        l7 = stats_dict['L7'].copy().add_suffix('_L7')
-        l14 = stats_dict['L14'].copy().add_suffix('_L14')
-        
-        # Merge on PLAYER_ID
-        merged = pd.merge(base_df, l7, left_on='PLAYER_ID', right_on='PLAYER_ID_L7', how='left')
-        merged = pd.merge(merged, l14, left_on='PLAYER_ID', right_on='PLAYER_ID_L14', how='left')
-        
-        # Add Schedule Grid to Players
-        if not team_df.empty:
-            schedule_cols = ['Games'] + day_cols
-            team_schedule = team_df[['Team'] + schedule_cols].rename(columns={'Team': 'TEAM_ABBREVIATION'})
-            merged = pd.merge(merged, team_schedule, on='TEAM_ABBREVIATION', how='left')
-            
-            # Fill NaN schedule
-            for c in schedule_cols:
-                if c == 'Games':
-                    merged[c] = merged[c].fillna(0).astype(int)
-                else:
-                    merged[c] = merged[c].fillna('-')
-        
-        # Format Player
-        merged['Player'] = merged.apply(lambda x: f"<b>{x['PLAYER_NAME']}</b> <br><span style='color:#888'>{x['TEAM_ABBREVIATION']}</span>", axis=1)
-        
-        # Format Stats (Season)
-        merged['FG%'] = (merged['FG_PCT'] * 100).map('{:.1f}%'.format)
-        merged['FT%'] = (merged['FT_PCT'] * 100).map('{:.1f}%'.format)
-        merged = merged.rename(columns={'FG3M': '3PM'})
-        
-        # Format Stats (L7)
-        if 'FG_PCT_L7' in merged.columns:
-            merged['FG%_L7'] = (merged['FG_PCT_L7'] * 100).map('{:.1f}%'.format)
-            merged['FT%_L7'] = (merged['FT_PCT_L7'] * 100).map('{:.1f}%'.format)
-            merged = merged.rename(columns={'FG3M_L7': '3PM_L7', 'PTS_L7': 'PTS_L7', 'REB_L7': 'REB_L7', 'AST_L7': 'AST_L7', 'STL_L7': 'STL_L7', 'BLK_L7': 'BLK_L7'})
-            
-        # Format Stats (L14)
-        if 'FG_PCT_L14' in merged.columns:
-            merged['FG%_L14'] = (merged['FG_PCT_L14'] * 100).map('{:.1f}%'.format)
-            merged['FT%_L14'] = (merged['FT_PCT_L14'] * 100).map('{:.1f}%'.format)
-            merged = merged.rename(columns={'FG3M_L14': '3PM_L14', 'PTS_L14': 'PTS_L14', 'REB_L14': 'REB_L14', 'AST_L14': 'AST_L14', 'STL_L14': 'STL_L14', 'BLK_L14': 'BLK_L14'})
+            season_end = pd.Timestamp(schedule['GAME_DATE'].max()).date()
+            n_season_weeks = 1 + max(-(-(season_end - w1_end).days // 7), 0)
+            season_weeks = build_weeks(w1_start, w1_end, n_season_weeks)
+            final_end = max(final_end, season_weeks[-1]['end'])
 
-        return team_df, merged, day_cols
+    # Team x day index over the whole horizon; every week is a slice of it
+    with metrics.stage('schedule_index'):
+        schedule_index = utils.ScheduleIndex(inputs['schedule'], w1_start, final_end)
 
-    # 4. Generate HTML
-    def generate_html(team_df, player_df, day_cols, table_id_suffix):
-        if player_df.empty: return "<p>No data.</p>"
-        
-        # --- Team Table HTML ---
-        team_html = ""
-        if not team_df.empty:
-            team_html = f"""
-            <div class="team-section">
-                <h3>Team Schedule (Click to Filter Players)</h3>
-                <table id="teamTable{table_id_suffix}" class="display compact" style="width:100%">
-                    <thead>
-                        <tr>
-                            <th>Team</th>
-                            <th>Games</th>
-                            {''.join([f'<th>{d}</th>' for d in day_cols])}
-                        </tr>
-                    </thead>
-                    <tbody>
-            """
-            for _, row in team_df.iterrows():
-                team_html += f"<tr class='team-row' data-team='{row['Team']}' onclick='filterTeam(this, \"{row['Team']}\", \"{table_id_suffix}\")'>"
-                team_html += f"<td><b>{row['Team']}</b></td><td>{row['Games']}</td>"
-                for d in day_cols:
-                    team_html += f"<td>{row[d]}</td>"
-                team_html += "</tr>"
-            team_html += "</tbody></table></div>"
-
-        # --- Player Table HTML ---
-        # Columns: Player, Games, [Days], [Stats Season], [Stats L7], [Stats L14]
-        
-        # Stat Columns Definition
-        stat_metrics = ['MIN', 'PTS', 'REB', 'AST', '3PM', 'STL', 'BLK', 'FG%', 'FT%']
-        
-        player_html = f"""
-        <div class="player-section">
-            <div class="controls">
-                <button class="btn-stat active" onclick="switchStats('Season', '{table_id_suffix}')">Season Avg</button>
-                <button class="btn-stat" onclick="switchStats('L7', '{table_id_suffix}')">Last 7 Days</button>
-                <button class="btn-stat" onclick="switchStats('L14', '{table_id_suffix}')">Last 14 Days</button>
-                <button class="btn-reset" onclick="resetTeamFilter('{table_id_suffix}')">Show All Teams</button>
-            </div>
-            <table id="playerTable{table_id_suffix}" class="display" style="width:100%">
-                <thead>
-                    <tr>
-                        <th>Player</th>
-                        <th>Team</th> <!-- Hidden column for filtering -->
-                        <th>Games</th>
-                        {''.join([f'<th>{d}</th>' for d in day_cols])}
-                        <!-- Season Stats Headers -->
-                        {''.join([f'<th class="stat-season">{m}</th>' for m in stat_metrics])}
-                        <!-- L7 Stats Headers -->
-                        {''.join([f'<th class="stat-l7" style="display:none">{m}</th>' for m in stat_metrics])}
-                        <!-- L14 Stats Headers -->
-                        {''.join([f'<th class="stat-l14" style="display:none">{m}</th>' for m in stat_metrics])}
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for _, row in player_df.iterrows():
-            player_html += f"<tr>"
-            player_html += f"<td>{row['Player']}</td>"
-            player_html += f"<td>{row['TEAM_ABBREVIATION']}</td>" # Hidden Team
-            player_html += f"<td>{row.get('Games', 0)}</td>"
-            for d in day_cols:
-                player_html += f"<td>{row.get(d, '')}</td>"
-            
-            # Helper to create stat cell with data-order
-            def create_stat_cell(row, metric, suffix, css_class, visible=True):
-                key = f"{metric}_{suffix}" if suffix else metric
-                val = row.get(key, 0)
-                
-                # Determine sort value (raw number)
-                sort_val = val
-                if isinstance(val, str) and '%' in val: # Handle pre-formatted % strings if any (though we formatted them in process_week_grid)
-                     try: sort_val = float(val.strip('%'))
-                     except: sort_val = 0
-                
-                # Determine display value
-                display_val = val
-                if isinstance(val, float):
-                    display_val = f"{val:.1f}"
-                
-                style = "" if visible else "display:none"
-                return f"<td class='{css_class}' style='{style}' data-order='{sort_val}'>{display_val}</td>"
+    # 1. Build the player table once (stats side is identical for every week)
+    # Stat periods shown as buttons (Season first, it is the base of the player table)
+    periods = list(league['periods'])
+    categories, punt = list(league['categories']), list(league['punt'])
+    if categories == valuation.CATEGORIES and punt == valuation.PUNT:
+        stats_dict = inputs['valued']
+    else:
+        with metrics.stage('valuation'):
+            engine = inputs['engine'] if categories == valuation.CATEGORIES else valuation.ValuationEngine(inputs['stats'], categories)
+            stats_dict = engine.apply(inputs['stats'], punt=punt)
+    player_df = build_player_frame(stats_dict, periods)
+    player_rows = schedule_index.team_rows(player_df['TEAM_ABBREVIATION'])
+    # Position group per player: badges and projections use defense vs that position
+    player_df['POS'] = dvp_table.position_codes(player_df['PLAYER_ID'])
 
-            # Season Stats
-            for m in stat_metrics:
-                player_html += create_stat_cell(row, m, "", "stat-season", True)
-                
-            # L7 Stats
-            for m in stat_metrics:
-                player_html += create_stat_cell(row, m, "L7", "stat-l7", False)
+    # Data inputs shared by every week tab (write_report adds the rendering code)
+    stat_metrics = list(league['metrics'])
+    ranks = sorted((abbr, info['Rank'], info['DefRtg']) for abbr, info in def_ratings.items())
+    base_digest = fragments.digest(player_df, player_rows, ranks, dvp_table.rank, periods, stat_metrics)
 
-            # L14 Stats
-            for m in stat_metrics:
-                player_html += create_stat_cell(row, m, "L14", "stat-l14", False)
-                
-            player_html += "</tr>"
-            
-        player_html += "</tbody></table></div>"
-        
-        return team_html + "<hr>" + player_html
+    # 2. Generate the week tabs (each week only slices the schedule)
+    weeks = build_weeks(w1_start, w1_end, league['weeks'])
 
-    # Generate 4 Weeks
-    weeks_data = []
-    current_start = w1_start
-    current_end = w1_end
-    
-    for i in range(4):
-        print(f"Processing Week {i+1} ({current_start} - {current_end})...")
-        t, p, d = process_week_grid(current_start, current_end, full_schedule, stats_dict, def_ratings)
-        content = generate_html(t, p, d, f'W{i+1}')
-        weeks_data.append({
-            'id': f'Week{i+1}',
-            'label': f'Week {i+1} ({current_start.strftime("%m/%d")} - {current_end.strftime("%m/%d")})',
-            'content': content
-        })
-        
-        # Next week
-        current_start = current_end + timedelta(days=1)
-        current_end = current_start + timedelta(days=6)
+    # Projected weekly value of every player for every week tab (from Season when the league hides PROJECTION_PERIOD)
+    period = projection.PROJECTION_PERIOD if projection.PROJECTION_PERIOD in periods else 'Season'
+    projected = project_weeks(player_df, schedule_index, def_ratings, weeks, dvp_table, categories, punt, period)
+
+    # Streaming add/drop plan per week (roster from the league or $NBA_ROSTER). Without
+    # a roster the plan would pick from every player, rostered ones included: no plan
+    plans = [None] * len(weeks)
+    if league['roster'] or planner.ROSTER_FILE:
+        roster_config = planner.load_config(league['roster'])
+        value_col = 'VALUE' if period == 'Season' else f'VALUE_{period}'
+        with metrics.stage('planner'):
+            plans = [planner.plan_week(player_df, schedule_index, w, def_ratings, roster_config, value_col, dvp_table) for w in weeks]
+
+    # Games per team and week through the end of the season (one table, not week tabs)
+    season_outlook = None
+    if season_weeks is not None:
+        season_outlook = {
+            'weeks': season_weeks,
+            'games': schedule_index.games_by_week(season_weeks),
+            'playoff_weeks': min(league['playoff_weeks'], len(season_weeks)),
+        }
+
+    return {
+        'season': season_str,
+        'weeks': weeks,
+        'periods': periods,
+        'stat_metrics': stat_metrics,
+        'schedule_index': schedule_index,
+        'stats': stats_dict,
+        'def_ratings': def_ratings,
+        'dvp': dvp_table,
+        'player_df': player_df,
+        'player_rows': player_rows,
+        'base_digest': base_digest,
+        'projected': projected,
+        'plans': plans,
+        'season_outlook': season_outlook,
+    }
+
+def build_report_data(today=None, n_weeks=REPORT_WEEKS, rest_of_season=False):
+    """
+    Fetches and computes everything the report shows, whatever the output mode:
+    schedule index, stats with 9-cat values, player frame, week tabs, projections
+    and streaming plans (plus the rest-of-season table with rest_of_season).
+    Returns a dict for write_report (server.py keeps one hot).
+    """
+    league = dict(DEFAULT_LEAGUE, weeks=n_weeks, rest_of_season=rest_of_season)
+    return build_league_data(fetch_report_inputs([league], today), league)
+
+def write_report(f, data, mode='html', asset_dir=None, use_fragments=True):
+    """
+    Streams the report page for data (from build_report_data) to the file object f.
+    In html mode a week tab whose inputs are unchanged is copied from the
+    fragment store instead of re-rendered (use_fragments=False renders every
+    week in memory and leaves the store alone). In split mode the same week tabs go
+    to content-hashed files in asset_dir (see artifacts.py) and the page only
+    holds the tab shell. Returns the fragment keys used.
+    """
+    if mode == 'split' and asset_dir is None:
+        raise ValueError('split mode needs an asset_dir for the week files')
+    weeks, periods = data['weeks'], data['periods']
+    schedule_index, def_ratings, dvp_table = data['schedule_index'], data['def_ratings'], data['dvp']
+    player_df, player_rows, projected = data['player_df'], data['player_rows'], data['projected']
+    stat_metrics = data.get('stat_metrics', STAT_METRICS) # Older snapshots have the default columns
+
+    # Pre-rendered stat cells, shared by every week tab (built on the first week
+    # that is not reused from a previous run)
+    stat_cells = None
+
+    # A week is only re-rendered when its data or the rendering code changed
+    base_digest = fragments.digest(fragments.source_digest(__file__, utils.__file__, dvp.__file__, formatting.__file__, schema.__file__), data['base_digest'])
 
     # Generate HTML Components outside f-string to avoid backslash errors in Python < 3.12
     tabs_html = ""
-    for i, w in enumerate(weeks_data):
+    for i, w in enumerate(weeks):
         is_active = 'id="defaultOpen"' if i == 0 else ''
-        tabs_html += f'<button class="tablinks" onclick="openWeek(event, \'{w["id"]}\')" {is_active}>{w["label"]}</button>\n'
+        load = f'; loadWeek(\'{w["id"]}\')' if mode == 'split' else ''
+        tabs_html += f'<button class="tablinks" onclick="openWeek(event, \'{w["id"]}\'){load}" {is_active}>{w["label"]}</button>\n'
+    outlook = data.get('season_outlook') # Older snapshots have none
+    if outlook is not None:
+        tabs_html += f'<button class="tablinks" onclick="openWeek(event, \'Season\')">Rest of Season ({len(outlook["weeks"])} wk)</button>\n'
+
+    # Week tabs are streamed into the page where this marker sits
+    content_html = "<!--WEEK_CONTENT-->"
+
+    # Stat period switching of the server-rendered tables (html and split modes)
+    switch_stats_script = f"""            // --- Feature: Switch Stats ---
+            function switchStats(period, suffix) {{
+                // Update Buttons
+                var container = document.querySelector('#Week' + suffix.replace('W','') + ' .controls');
+                var btns = container.getElementsByClassName('btn-stat');
+                for (var i = 0; i < btns.length; i++) {{
+                    btns[i].classList.toggle('active', btns[i].dataset.period == period);
+                }}
+                
+                // Toggle Columns
+                var periods = {json.dumps([p.lower() for p in periods])};
+                periods.forEach(p => {{
+                    var display = (p == period.toLowerCase()) ? 'table-cell' : 'none';
+                    $('.stat-' + p).css('display', display);
+                }});
+            }}
+"""
 
-    content_html = ""
-    for w in weeks_data:
-        content_html += f'<div id="{w["id"]}" class="tabcontent">{w["content"]}</div>\n'
+    # Mode-specific table setup
+    if mode == 'json':
+        mode_script = JSON_MODE_SCRIPT
+    elif mode == 'split':
+        mode_script = SPLIT_MODE_SCRIPT + switch_stats_script
+    else:
+        init_tables = ''.join([f'''
+                tables['W{i+1}'] = $('#playerTableW{i+1}').DataTable({{ "order": [[ 2, "desc" ]], "pageLength": 25 }});
+                $('#teamTableW{i+1}').DataTable({{ "paging": false, "info": false, "searching": false }});
+                ''' for i in range(len(weeks))])
+        mode_script = f"""
+            $(document).ready( function () {{
+                // Initialize DataTables for all weeks
+                {init_tables}
+
+                // Open default tab
+                document.getElementById("defaultOpen").click();
+            }});
+            
+""" + switch_stats_script
 
     html_template = f"""
     <!DOCTYPE html>
@@ -331,16 +953,7 @@ def generate_html_report():
         <script>
             var tables = {{}};
             
-            $(document).ready( function () {{
-                // Initialize DataTables for all weeks
-                {''.join([f'''
-                tables['W{i+1}'] = $('#playerTableW{i+1}').DataTable({{ "order": [[ 2, "desc" ]], "pageLength": 25 }});
-                $('#teamTableW{i+1}').DataTable({{ "paging": false, "info": false, "searching": false }});
-                ''' for i in range(4)])}
-
-                // Open default tab
-                document.getElementById("defaultOpen").click();
-            }});
+            {mode_script}
             
             function openWeek(evt, weekName) {{
                 var i, tabcontent, tablinks;
@@ -356,26 +969,6 @@ def generate_html_report():
                 evt.currentTarget.className += " active";
             }}
             
-            // --- Feature: Switch Stats ---
-            function switchStats(period, suffix) {{
-                // Update Buttons
-                var container = document.querySelector('#Week' + suffix.replace('W','') + ' .controls');
-                var btns = container.getElementsByClassName('btn-stat');
-                for (var i = 0; i < btns.length; i++) {{
-                    btns[i].classList.remove('active');
-                    if (btns[i].innerText.includes(period) || (period=='Season' && btns[i].innerText.includes('Season'))) {{
-                        btns[i].classList.add('active');
-                    }}
-                }}
-                
-                // Toggle Columns
-                var periods = ['season', 'l7', 'l14'];
-                periods.forEach(p => {{
-                    var display = (p == period.toLowerCase()) ? 'table-cell' : 'none';
-                    $('.stat-' + p).css('display', display);
-                }});
-            }}
-            
             // --- Feature: Filter Team ---
             function filterTeam(row, teamAbbr, suffix) {{
                 // Highlight Row
@@ -404,6 +997,7 @@ def generate_html_report():
                 <span class="dot" style="background-color:#ffffcc"></span>Average 
                 <span class="dot" style="background-color:#ffe5cc"></span> 
                 <span class="dot" style="background-color:#ffcccc"></span>Hard (Red)
+                &nbsp;·&nbsp; Team rows: team defensive rank. Player rows: rank against the player's position.
             </div>
 
             <div class="tab">
@@ -416,12 +1010,210 @@ def generate_html_report():
     </html>
     """
     
-    output_file = "fantasy_nba_report_v2.html"
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html_template)
-        
-    print(f"Report generated: {output_file}")
-    webbrowser.open('file://' + os.path.realpath(output_file))
+    page_head, page_tail = html_template.split(content_html)
+
+    used_fragments = set()
+    used_artifacts = set()
+
+    def render_week(i, w, out):
+        nonlocal stat_cells
+        if stat_cells is None:
+            stat_cells = build_stat_cells(player_df, periods, stat_metrics)
+        t, sched, d = process_week_grid(w['start'], w['end'], schedule_index, player_rows, def_ratings, player_df['POS'].to_numpy(), dvp_table)
+        generate_html(out, t, player_df, sched, stat_cells, d, f'W{i+1}', periods, projected[w['id']], stat_metrics)
+
+    def write_week_tables(i, w, out):
+        if not use_fragments:
+            render_week(i, w, out)
+            return
+        key = week_fragment_key(schedule_index, w, f'W{i+1}', base_digest, projected[w['id']])
+        used_fragments.add(key)
+        if fragments.exists(key):
+            print("  ♻️ Unchanged, reusing the previous run's fragment")
+            metrics.add(reused_fragments=1)
+        else:
+            with fragments.writer(key) as frag:
+                render_week(i, w, frag)
+        fragments.copy_to(key, out)
+
+    f.write(page_head)
+    for i, w in enumerate(weeks):
+        print(f"Processing Week {i+1} ({w['start']} - {w['end']})...")
+        if mode == 'split':
+            # The tab's content is its own file, fetched when the tab opens
+            week = io.StringIO()
+            write_week_tables(i, w, week)
+            week.write(planner_section_html(data['plans'][i]))
+            filename = artifacts.publish(asset_dir, w['id'], week.getvalue().encode('utf-8'))
+            used_artifacts.add(filename)
+            f.write(f'<div id="{w["id"]}" class="tabcontent" data-src="{os.path.basename(asset_dir)}/{filename}"></div>\n')
+            continue
+        f.write(f'<div id="{w["id"]}" class="tabcontent">')
+        if mode == 'json':
+            day_cols = [(w['start'] + timedelta(days=k)).strftime('%a (%m/%d)') for k in range((w['end'] - w['start']).days + 1)]
+            generate_week_shell(f, day_cols, f'W{i+1}', periods, stat_metrics)
+        else:
+            write_week_tables(i, w, f)
+        f.write(planner_section_html(data['plans'][i]))
+        f.write('</div>\n')
+    if mode == 'json':
+        payload = build_report_payload(player_df, schedule_index, weeks, def_ratings, periods, projected, dvp_table, stat_metrics)
+        payload = json.dumps(payload, separators=(',', ':'))
+        f.write('<script type="application/json" id="report-data">' + payload.replace('</', '<\\/') + '</script>\n')
+    if outlook is not None:
+        f.write(f'<div id="Season" class="tabcontent">{season_outlook_html(outlook, schedule_index)}</div>\n')
+    f.write(page_tail)
+    if mode == 'split':
+        artifacts.prune(asset_dir, used_artifacts)
+    return used_fragments
+
+def save_report_data(data, path):
+    """
+    Stores report data (from build_report_data) at path, so the page can be
+    re-rendered later without fetching. Snapshots are pickles: only load ones
+    this tool wrote.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def load_report_data(path):
+    """Loads a snapshot written by save_report_data (nba_api is not imported)."""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def write_report_file(data, output_file, mode):
+    """
+    Writes the page for data to output_file. It is written next to the output
+    and only moved over it if the content changed.
+    Returns (fragment keys used, whether output_file was rewritten).
+    """
+    # Streaming stage: includes the per-week grid and HTML stages nested in it
+    with metrics.stage('write_report'), open(output_file + '.tmp', "w", encoding="utf-8") as f:
+        used_fragments = write_report(f, data, mode, artifacts.asset_dir(output_file))
+    return used_fragments, fragments.replace_if_changed(output_file + '.tmp', output_file)
+
+def generate_html_report(mode=None, output_file=OUTPUT_FILE, n_weeks=REPORT_WEEKS, open_browser=OPEN_BROWSER,
+                         snapshot=None, save_snapshot=None, rest_of_season=False):
+    """
+    Fetches the data and writes the report (n_weeks week tabs) to output_file.
+    mode 'html' (default, or $REPORT_MODE) renders every table server-side;
+    'json' embeds one compact data payload and renders the tables in the browser;
+    'split' writes the html tables as one precompressed file per week, next to
+    output_file, loaded when its tab opens (the page must then be served over HTTP).
+    With snapshot (a save_snapshot file from an earlier run) nothing is fetched:
+    the page is re-rendered from the stored data, with its own horizon.
+    rest_of_season adds a games-per-week table through the end of the season.
+    """
+    mode = mode or os.environ.get('REPORT_MODE', 'html')
+    if snapshot:
+        print(f"Rendering from snapshot {snapshot}...")
+        with metrics.stage('load_snapshot'):
+            data = load_report_data(snapshot)
+    else:
+        utils.set_deadline(utils.RUN_DEADLINE) # Bounds every request and retry sleep of this run
+        print("Initializing Fantasy NBA Report Generator V2...")
+        data = build_report_data(n_weeks=n_weeks, rest_of_season=rest_of_season)
+    if save_snapshot:
+        save_report_data(data, save_snapshot)
+        print(f"💾 Report data saved to {save_snapshot}")
+
+    used_fragments, changed = write_report_file(data, output_file, mode)
+    if mode in ('html', 'split'):
+        fragments.prune(used_fragments)
+    if changed:
+        print(f"Report generated: {output_file}")
+    else:
+        print(f"Report unchanged: {output_file}")
+    metrics.print_summary()
+    metrics_file = metrics.write()
+    if metrics_file:
+        print(f"📊 Metrics written to {metrics_file}")
+    if open_browser:
+        import webbrowser
+        webbrowser.open('file://' + os.path.realpath(output_file))
+
+def load_leagues(path):
+    """
+    Reads a batch config: a JSON list of leagues, each overriding DEFAULT_LEAGUE
+    (name, output, mode, weeks, rest_of_season, playoff_weeks, week_end, periods,
+    categories, punt, metrics, roster). Every league needs its own output file.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    leagues = []
+    for i, config in enumerate(configs):
+        unknown = set(config) - set(DEFAULT_LEAGUE)
+        if unknown:
+            raise ValueError(f"league {i + 1}: unknown settings {sorted(unknown)}")
+        league = dict(DEFAULT_LEAGUE, name=f'league{i + 1}')
+        league.update(config)
+        if list(league['periods'])[:1] != ['Season'] or set(league['periods']) - set(utils.STAT_PERIODS):
+            raise ValueError(f"league {league['name']}: periods must start with Season and be among {list(utils.STAT_PERIODS)}")
+        unsupported = set(league['categories']) - set(valuation.CATEGORIES) - set(projection.PROJECTED_COLUMNS)
+        if unsupported:
+            raise ValueError(f"league {league['name']}: unsupported categories {sorted(unsupported)}")
+        leagues.append(league)
+    outputs = [league['output'] for league in leagues]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError('every league needs its own output file')
+    return leagues
+
+# Shared inputs of a batch, set once per worker process
+_batch_inputs = None
+
+def _init_batch_worker(inputs):
+    global _batch_inputs
+    _batch_inputs = inputs
+
+def render_league(league, inputs=None):
+    """
+    Builds one league's report from the batch's shared inputs and writes it.
+    Without inputs it runs in a batch worker process and also returns the
+    stages it recorded, for the parent to merge.
+    Returns (fragment keys used, rewritten, mode, worker stage metrics).
+    """
+    in_worker = inputs is None
+    if in_worker:
+        inputs = _batch_inputs
+        metrics.reset() # Forked workers start with the parent's stages
+    mode = league['mode'] or os.environ.get('REPORT_MODE', 'html')
+    data = build_league_data(inputs, league)
+    used_fragments, changed = write_report_file(data, league['output'], mode)
+    return used_fragments, changed, mode, metrics.snapshot() if in_worker else {}
+
+def generate_batch_reports(leagues, today=None, workers=BATCH_WORKERS):
+    """
+    Writes the reports of several leagues with one fetch: the data every league
+    shares (schedule over the longest horizon, stats, ratings, DvP, z-scores)
+    is fetched and built once, then each league's valuation, projections,
+    plans and page run in a pool of worker processes.
+    """
+    utils.set_deadline(utils.RUN_DEADLINE)
+    print(f"Initializing Fantasy NBA Report Generator V2 for {len(leagues)} leagues...")
+    inputs = fetch_report_inputs(leagues, today)
+
+    workers = max(1, min(workers, len(leagues)))
+    with metrics.stage('render_leagues'):
+        if workers == 1:
+            results = [render_league(league, inputs) for league in leagues]
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_batch_worker, initargs=(inputs,)) as pool:
+                results = list(pool.map(render_league, leagues))
+
+    used_fragments = set()
+    for (used, changed, mode, worker_stages), league in zip(results, leagues):
+        metrics.merge(worker_stages)
+        used_fragments |= used
+        print(f"{'Report generated' if changed else 'Report unchanged'}: {league['output']} ({league['name']})")
+    if any(mode in ('html', 'split') for _, _, mode, _ in results):
+        fragments.prune(used_fragments) # Keeps every league's fragments
+    metrics.print_summary()
+    metrics_file = metrics.write()
+    if metrics_file:
+        print(f"📊 Metrics written to {metrics_file}")
 
 if __name__ == "__main__":
-    generate_html_report()
+    import cli
+    cli.main()
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource # Unix only
+except ImportError:
+    resource = None
+
+# Constants
+METRICS_FILE = os.environ.get('NBA_METRICS', '') # .json, anything else is Prometheus text
+PROFILE = os.environ.get('NBA_PROFILE', '') # 'cprofile', 'tracemalloc' or both, comma-separated
+PROFILE_FILE = 'report.prof'
+
+COUNTERS = ['calls', 'wall_s', 'retries', 'backoff_s', 'bytes', 'rows', 'cache_hits', 'stale_hits', 'reused_fragments']
+
+_lock = threading.Lock()
+_local = threading.local()
+_stages = {}
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+def _record(name):
+    rec = _stages.get(name)
+    if rec is None:
+        rec = _stages[name] = dict.fromkeys(COUNTERS, 0)
+        rec['peak_mem_bytes'] = 0
+    return rec
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def _max_rss():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024 # kB on Linux
+
+@contextmanager
+def stage(name):
+    """
+    Times a block as stage `name` and makes it the target of add() for this thread.
+    Peak memory is the tracemalloc peak inside the stage when tracing (shared by
+    stages running concurrently in other threads), else the process peak RSS.
+    """
+    stack = _stack()
+    frame = {'name': name, 'peak': 0}
+    if tracemalloc.is_tracing():
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - t0
+        stack.pop()
+        if tracemalloc.is_tracing():
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        else:
+            peak = _max_rss()
+        with _lock:
+            rec = _record(name)
+            rec['calls'] += 1
+            rec['wall_s'] += wall
+            rec['peak_mem_bytes'] = max(rec['peak_mem_bytes'], peak)
+
+def add(**counters):
+    """
+    Adds to the counters of the innermost stage running in this thread,
+    e.g. add(retries=1, backoff_s=5). Outside any stage they go to '(none)'.
+    """
+    stack = _stack()
+    name = stack[-1]['name'] if stack else '(none)'
+    with _lock:
+        rec = _record(name)
+        for key, value in counters.items():
+            rec[key] += value
+
+def timed(name, rows=None):
+    """
+    Decorator form of stage(). rows(result) gives the row count to record.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    add(rows=rows(result))
+                return result
+        return wrapper
+    return decorator
+
+def response_bytes(endpoint):
+    """Size of the raw body behind an nba_api endpoint object (0 if unknown)."""
+    try:
+        return len(endpoint.nba_response.get_response().encode('utf-8'))
+    except (AttributeError, TypeError):
+        return 0
+
+def merge(stages):
+    """
+    Adds stages recorded elsewhere (a worker process's snapshot()) to this
+    process's: counters are summed, peak memory is the highest.
+    """
+    with _lock:
+        for name, counters in stages.items():
+            rec = _record(name)
+            for key in COUNTERS:
+                rec[key] += counters.get(key, 0)
+            rec['peak_mem_bytes'] = max(rec['peak_mem_bytes'], counters.get('peak_mem_bytes', 0))
+
+def snapshot():
+    with _lock:
+        return {name: dict(rec) for name, rec in _stages.items()}
+
+def to_prometheus(stages):
+    lines = []
+    for counter in COUNTERS + ['peak_mem_bytes']:
+        metric = f'nba_report_stage_{counter}'
+        lines.append(f'# TYPE {metric} gauge')
+        for name in sorted(stages):
+            lines.append(f'{metric}{{stage="{name}"}} {stages[name][counter]}')
+    return '\n'.join(lines) + '\n'
+
+def write(path=None):
+    """
+    Writes the recorded stages to path (default $NBA_METRICS): JSON for a .json
+    path, Prometheus text exposition format otherwise. No-op without a path.
+    """
+    path = path or METRICS_FILE
+    if not path:
+        return None
+    stages = snapshot()
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            json.dump({'created_at': time.time(), 'stages': stages}, f, indent=2)
+        else:
+            f.write(to_prometheus(stages))
+    return path
+
+def print_summary():
+    stages = snapshot()
+    print("⏱️ Stage timings:")
+    for name in sorted(stages, key=lambda n: -stages[n]['wall_s']):
+        rec = stages[name]
+        extra = ''
+        if rec['retries']:
+            extra += f", {rec['retries']} retries ({rec['backoff_s']:.0f}s backoff)"
+        if rec['bytes']:
+            extra += f", {rec['bytes'] / 1024:.0f} KiB received"
+        if rec['stale_hits']:
+            extra += f", {rec['stale_hits']} stale cache fallbacks"
+        print(f"  {name:<28} {rec['wall_s']:8.2f}s  x{rec['calls']}{extra}")
+
+@contextmanager
+def profiling(modes=None):
+    """
+    Runs a block under cProfile and/or tracemalloc as selected by modes
+    (default $NBA_PROFILE). cProfile stats are dumped to PROFILE_FILE.
+    """
+    modes = set(filter(None, (modes if modes is not None else PROFILE).split(',')))
+    profiler = None
+    if 'tracemalloc' in modes:
+        tracemalloc.start()
+    if 'cprofile' in modes:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(PROFILE_FILE)
+            print(f"📈 cProfile stats written to {PROFILE_FILE}")
+        if 'tracemalloc' in modes:
+            # Stages reset the tracemalloc peak, so take the highest one they saw
+            peak = max([rec['peak_mem_bytes'] for rec in snapshot().values()] + [tracemalloc.get_traced_memory()[1]])
+            print(f"📈 Peak traced memory: {peak / 2**20:.1f} MiB")
+            tracemalloc.stop()
@@ -0,0 +1,218 @@
+import os
+import json
+import numpy as np
+from datetime import timedelta
+
+import projection
+
+# Constants
+ROSTER_FILE = os.environ.get('NBA_ROSTER', '') # JSON roster config, see load_config
+CANDIDATE_POOL = 300 # Best free agents (by per-game value, or games this week) considered for adds
+
+# Settings a roster file leaves out: one open spot with a typical weekly add limit.
+# The report only plans for leagues with a roster file (see generate_report.build_league_data)
+DEFAULT_CONFIG = {
+    'roster': [],        # Players on the team (names or PLAYER_IDs)
+    'droppable': [],     # Roster players whose spot may be streamed
+    'open_slots': 1,     # Empty roster spots
+    'active_slots': None, # Daily lineup spots (None: every rostered game counts)
+    'adds': 4,           # Weekly add limit
+    'objective': 'value', # 'value' (per-game 9-cat value) or 'games'
+    'unavailable': [],   # Players rostered by other teams
+}
+
+def load_config(path=None):
+    """
+    Reads the roster config (default $NBA_ROSTER) over DEFAULT_CONFIG.
+    """
+    config = dict(DEFAULT_CONFIG)
+    path = path or ROSTER_FILE
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+def resolve_players(player_df, refs):
+    """Row positions in player_df of players given by PLAYER_ID or name (unknown ones are skipped)."""
+    ids = {int(pid): i for i, pid in enumerate(player_df['PLAYER_ID'].to_numpy())}
+    names = {str(name).lower(): i for i, name in enumerate(player_df['PLAYER_NAME'].to_numpy())}
+    rows = []
+    for ref in refs:
+        row = ids.get(ref) if isinstance(ref, int) else names.get(str(ref).lower())
+        if row is not None:
+            rows.append(row)
+    return rows
+
+def _best_holders(vals, budget):
+    """
+    plan_slot's dynamic program over (day, adds used, holder), re-adds allowed.
+    vals: (candidates + 1) x days, the last row being the initial holder; -inf
+    where a holder is not allowed. A holder either carries over or is replaced
+    by the best state with one add fewer, so a week costs
+    O(days x budget x candidates) vector work.
+    """
+    n_cand, n_days = vals.shape[0] - 1, vals.shape[1]
+    init = n_cand # Extra state: the initial holder, which can never be re-added
+    neg = -np.inf
+
+    f = np.full((budget + 1, n_cand + 1), neg)
+    f[0, init] = vals[init, 0]
+    switched = np.zeros((n_days, budget + 1, n_cand + 1), dtype=bool)
+    came_from = np.full((n_days, budget + 1), -1, dtype=np.int64)
+    if budget:
+        f[1, :n_cand] = vals[:n_cand, 0]
+        switched[0, 1, :n_cand] = True
+
+    for d in range(1, n_days):
+        best_prev = f.argmax(axis=1)
+        g = f.copy() # Keep the holder
+        for k in range(1, budget + 1):
+            prev_best = f[k - 1, best_prev[k - 1]]
+            better = prev_best > f[k, :n_cand]
+            g[k, :n_cand] = np.where(better, prev_best, f[k, :n_cand])
+            switched[d, k, :n_cand] = better
+            came_from[d, k] = best_prev[k - 1]
+        f = g + vals[:, d][None, :]
+
+    k, c = np.unravel_index(np.argmax(f), f.shape)
+    value = float(f[k, c])
+    holders = [0] * n_days
+    for d in range(n_days - 1, -1, -1):
+        holders[d] = -1 if c == init else int(c)
+        if switched[d, k, c]:
+            c = came_from[d, k] if d > 0 else init
+            k -= 1
+    return value, holders
+
+def _first_readd(holders):
+    """(candidate, day before it) for the first candidate held again after being dropped, else None."""
+    seen = set()
+    for d, h in enumerate(holders):
+        if d and h == holders[d - 1]:
+            continue
+        if h >= 0 and h in seen:
+            return h, d - 1
+        seen.add(h)
+    return None
+
+def plan_slot(values, init_values, budget, allowed):
+    """
+    Best sequence of holders for one roster spot over the days of a week.
+
+    values: (candidates x days) contribution of holding each candidate per day.
+    init_values: (days,) contribution of the current holder (zeros for an empty spot).
+    allowed: candidates this spot may add. Each switch costs one add, at most budget.
+    A dropped player cannot be re-added the same week, so each candidate is held
+    over at most one run of days.
+
+    The dynamic program (_best_holders) ignores that rule; a plan breaking it is
+    split on a day g between the two runs into plans holding that candidate only
+    before g, only after g, or on g, and the branches are solved again (branch
+    and bound, the unconstrained value being an upper bound). Plans rarely
+    re-add, so this usually takes one solve.
+    Returns (value, holders) with holders[d] = candidate held on day d (-1 = initial holder).
+    """
+    n_cand, n_days = values.shape
+    if n_days == 0:
+        return 0.0, []
+    neg = -np.inf
+    pending = [np.vstack([np.where(allowed[:, None], values, neg), init_values[None, :]])]
+    best_value, best_holders = neg, [-1] * n_days
+    while pending:
+        vals = pending.pop()
+        value, holders = _best_holders(vals, budget)
+        if not value > best_value:
+            continue
+        readd = _first_readd(holders)
+        if readd is None:
+            best_value, best_holders = value, holders
+            continue
+        c, g = readd
+        before, after, through = vals.copy(), vals.copy(), vals.copy()
+        before[c, g:] = neg
+        after[c, :g + 1] = neg
+        through[np.arange(n_cand + 1) != c, g] = neg
+        pending += [before, after, through]
+    return best_value, best_holders
+
+def plan_week(player_df, schedule_index, week, def_ratings, config, value_col='VALUE', dvp_table=None):
+    """
+    Add/drop plan for one week tab. Streaming spots (droppable players and open
+    slots) are planned one by one with plan_slot: the weekly add budget is split
+    between them by a knapsack over each spot's value-per-adds curve, and
+    candidates picked for one spot are excluded from the next. With active_slots
+    set, spot s only scores on days where the rest of the roster leaves more
+    than s lineup spots free.
+
+    Returns {'moves': [(date, add, drop)], 'value', 'baseline', 'objective'}.
+    """
+    lo = schedule_index.day_index(week['start'])
+    hi = schedule_index.day_index(week['end'] + timedelta(days=1))
+    days = schedule_index.days[lo:hi]
+    n_days = len(days)
+
+    # Per-player, per-day value: games weighted by matchup (vs the player's position), times per-game value
+    rows = schedule_index.team_rows(player_df['TEAM_ABBREVIATION'])
+    opp = np.vstack([schedule_index.opp[:, lo:hi], np.full((1, n_days), -1, dtype=schedule_index.opp.dtype)])[rows]
+    value = np.nan_to_num(player_df[value_col].to_numpy(dtype=np.float64)) if value_col in player_df.columns else np.zeros(len(player_df))
+    if config['objective'] == 'games':
+        day_values = (opp >= 0).astype(np.float64)
+        rank_key = day_values.sum(axis=1) # Games this week
+    else:
+        per_game = np.maximum(value, 0) # A below-average streamer is left on the bench
+        factors = projection.matchup_factors(schedule_index, def_ratings, dvp_table=dvp_table)
+        day_values = factors[projection.position_rows(player_df)[:, None], opp] * per_game[:, None]
+        rank_key = per_game
+
+    roster = resolve_players(player_df, config['roster'])
+    droppable = [r for r in resolve_players(player_df, config['droppable']) if r in roster]
+    core = [r for r in roster if r not in droppable]
+    taken = set(roster) | set(resolve_players(player_df, config['unavailable']))
+
+    # Candidate pool: best by rank_key, per-game value breaking ties
+    order = np.lexsort((-value, -rank_key))
+    candidates = np.array([r for r in order if r not in taken][:CANDIDATE_POOL], dtype=np.int64)
+    spots = [(r, day_values[r]) for r in droppable] + [(None, np.zeros(n_days))] * int(config['open_slots'])
+    budget = int(config['adds'])
+
+    # Lineup room left by the core roster, per day
+    if config['active_slots'] is None:
+        room = np.full(n_days, len(spots))
+    else:
+        core_games = (opp[core] >= 0).sum(axis=0) if core else np.zeros(n_days, dtype=np.int64)
+        room = np.maximum(int(config['active_slots']) - core_games, 0)
+
+    cand_values = day_values[candidates]
+    spot_usable = [(room > s).astype(np.float64) for s in range(len(spots))]
+
+    # Value-per-adds curve of each spot, then split the budget (knapsack over spots)
+    allowed = np.ones(len(candidates), dtype=bool)
+    curves = [[plan_slot(cand_values * use, init * use, k, allowed)[0] for k in range(budget + 1)]
+              for (_, init), use in zip(spots, spot_usable)]
+    best = {0: (0.0, [])}
+    for curve in curves:
+        nxt = {}
+        for used, (total, alloc) in best.items():
+            for k in range(budget - used + 1):
+                cand = (total + curve[k], alloc + [k])
+                if used + k not in nxt or cand[0] > nxt[used + k][0]:
+                    nxt[used + k] = cand
+        best = nxt
+    allocation = max(best.values(), key=lambda t: t[0])[1] if spots else []
+
+    moves = []
+    value = baseline = 0.0
+    for (holder, init), use, k in zip(spots, spot_usable, allocation):
+        spot_value, holders = plan_slot(cand_values * use, init * use, k, allowed)
+        value += spot_value
+        baseline += float((init * use).sum())
+        current = holder
+        for d, h in enumerate(holders):
+            row = None if h < 0 else int(candidates[h])
+            if h >= 0 and row != current:
+                moves.append((days[d], player_df['PLAYER_NAME'].iat[row], None if current is None else player_df['PLAYER_NAME'].iat[current]))
+                allowed[h] = False
+                current = row
+
+    moves.sort(key=lambda m: m[0])
+    return {'moves': moves, 'value': value, 'baseline': baseline, 'objective': config['objective']}
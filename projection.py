@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+import dvp
+
+# Counting stats projected per week. Percentages are re-derived from the
+# projected makes and attempts.
+PROJECTED_COLUMNS = ['MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'FG3M', 'TOV', 'FGM', 'FGA', 'FTM', 'FTA']
+
+# Playing time does not depend on the opponent
+UNADJUSTED_COLUMNS = {'MIN'}
+
+# Stat period the per-game rates come from
+PROJECTION_PERIOD = os.environ.get('NBA_PROJECTION_PERIOD', 'Season')
+
+# How strongly opponent defense moves a projection: 1.0 scales per-game stats
+# by the opponent's DefRtg relative to the league average (110 vs 100 -> +10%)
+DEF_ADJUST_STRENGTH = 1.0
+
+def matchup_factors(schedule_index, def_ratings, strength=DEF_ADJUST_STRENGTH, dvp_table=None):
+    """
+    Per-game multiplier for facing each team on the schedule_index team axis,
+    per position group (dvp.POSITIONS plus the team-wide row dvp.ALL), as a
+    (positions x teams + 1) array whose extra trailing 0 column is "no game"
+    (opp == -1). The team-wide row comes from DefRtg; position rows from the
+    fantasy points each team allows to that position (dvp_table), falling back
+    to the team-wide factor. Teams without a rating are neutral (1.0).
+    """
+    ratings = np.array([def_ratings.get(abbr, {}).get('DefRtg', np.nan) for abbr in schedule_index.team_abbrs], dtype=np.float64)
+    known = ~np.isnan(ratings)
+    team_wide = np.ones(len(ratings))
+    if known.any():
+        team_wide[known] = 1 + strength * (ratings[known] / ratings[known].mean() - 1)
+
+    factors = np.tile(team_wide, (dvp.ALL + 1, 1))
+    if dvp_table is not None and dvp_table.has_data:
+        by_position = dvp_table.factors(schedule_index.team_abbrs, strength)[:dvp.ALL]
+        factors[:dvp.ALL] = np.where(np.isnan(by_position), factors[:dvp.ALL], by_position)
+    return np.hstack([factors, np.zeros((dvp.ALL + 1, 1))])
+
+def position_rows(stats_df):
+    """Position group of each player (the POS column), dvp.ALL where unknown."""
+    if 'POS' not in stats_df.columns:
+        return np.full(len(stats_df), dvp.ALL, dtype=np.int64)
+    return stats_df['POS'].to_numpy(dtype=np.int64)
+
+class ProjectionEngine:
+    """
+    Projects per-game stats over the week tabs of a report, for every player at once.
+
+    Each scheduled game counts as the opponent's matchup factor against the
+    player's position, so a team's "adjusted games" in a week (per position)
+    is the sum of its opponents' factors. The projection is the (players x
+    weeks x categories) product of per-game rates and adjusted games, built
+    from prefix sums over the schedule index with no per-player or per-game
+    Python loops.
+    """
+    def __init__(self, schedule_index, def_ratings, weeks, strength=DEF_ADJUST_STRENGTH, dvp_table=None):
+        self.schedule_index = schedule_index
+        self.weeks = weeks
+        factors = matchup_factors(schedule_index, def_ratings, strength, dvp_table)
+
+        # Per team and day: games played, and matchup-weighted games per position
+        adj = factors[:, schedule_index.opp] # opp == -1 picks the trailing 0
+        n_teams = len(schedule_index.team_ids)
+        cum_games = np.concatenate([np.zeros((n_teams, 1)), np.cumsum(schedule_index.games, axis=1)], axis=1)
+        cum_adj = np.concatenate([np.zeros(adj.shape[:2] + (1,)), np.cumsum(adj, axis=2)], axis=2)
+
+        lo = np.array([schedule_index.day_index(w['start']) for w in weeks], dtype=np.int64)
+        hi = np.array([schedule_index.day_index(w['end'] + timedelta(days=1)) for w in weeks], dtype=np.int64)
+        # Team x week (position x team x week for adjusted games), with an extra
+        # all-zero team row for players on unknown teams (row -1)
+        self.week_games = np.vstack([cum_games[:, hi] - cum_games[:, lo], np.zeros((1, len(weeks)))])
+        week_adj = cum_adj[:, :, hi] - cum_adj[:, :, lo]
+        self.week_adj_games = np.concatenate([week_adj, np.zeros((len(adj), 1, len(weeks)))], axis=1)
+
+    def project(self, stats_df, columns=PROJECTED_COLUMNS):
+        """
+        Returns (games, totals, columns): scheduled games per player and week
+        (players x weeks) and projected totals (players x weeks x columns).
+        Columns missing from stats_df are left out; a POS column (position
+        group codes) selects position-specific matchup factors.
+        """
+        columns = [c for c in columns if c in stats_df.columns]
+        rows = self.schedule_index.team_rows(stats_df['TEAM_ABBREVIATION'])
+        per_game = stats_df[columns].to_numpy(dtype=np.float64)
+        per_game = np.nan_to_num(per_game)
+        games = self.week_games[rows]
+        adj_games = self.week_adj_games[position_rows(stats_df), rows]
+        adjusted = np.array([c not in UNADJUSTED_COLUMNS for c in columns])
+        multiplier = np.where(adjusted[None, None, :], adj_games[:, :, None], games[:, :, None])
+        totals = per_game[:, None, :] * multiplier
+        return games, totals, columns
+
+    def week_frames(self, stats_df):
+        """
+        Projected weekly totals as one stats frame per week tab (keyed by week id),
+        in the stats layout (GP = scheduled games, FG_PCT/FT_PCT from projected
+        makes and attempts) so they can be ranked like any stat period.
+        """
+        games, totals, columns = self.project(stats_df)
+        frames = {}
+        for w, week in enumerate(self.weeks):
+            df = pd.DataFrame(totals[:, w, :], columns=columns)
+            df.insert(0, 'PLAYER_ID', stats_df['PLAYER_ID'].to_numpy())
+            df.insert(1, 'GP', games[:, w].astype(np.int32))
+            if 'MIN' in columns:
+                df['MIN'] = np.divide(df['MIN'].to_numpy(), games[:, w], out=np.zeros(len(df)), where=games[:, w] > 0) # Per game, as the valuation pool expects
+            for pct, (makes, attempts) in {'FG_PCT': ('FGM', 'FGA'), 'FT_PCT': ('FTM', 'FTA')}.items():
+                if makes in columns and attempts in columns:
+                    df[pct] = np.divide(df[makes], df[attempts], out=np.zeros(len(df)), where=df[attempts] > 0)
+                elif pct in stats_df.columns:
+                    df[pct] = stats_df[pct].to_numpy()
+            frames[week['id']] = df
+        return frames
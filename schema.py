@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+# Compact column types enforced on every frame utils.py hands out.
+# Ids fit in int32, stats in float32; team abbreviations and matchups repeat
+# endlessly, so they are categoricals; dates are datetime64 for vector compares.
+INT_COLUMNS = ['PLAYER_ID', 'TEAM_ID', 'GP']
+FLOAT_COLUMNS = [
+    'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'FG3M', 'TOV',
+    'FGM', 'FGA', 'FTM', 'FTA', 'FG_PCT', 'FT_PCT'
+]
+CATEGORY_COLUMNS = ['MATCHUP']
+DATE_COLUMNS = ['GAME_DATE']
+
+@lru_cache(maxsize=None)
+def team_abbrs():
+    """
+    Every NBA team abbreviation, sorted: one shared category set for team
+    abbreviations, so frames stay comparable. nba_api's static team list is
+    only imported on first use, so rendering from a snapshot never loads it.
+    """
+    from nba_api.stats.static import teams
+    return sorted(t['abbreviation'] for t in teams.get_teams())
+
+def team_abbr_dtype(values=()):
+    """
+    Categorical dtype over every NBA abbreviation (plus any unknown one in values).
+    """
+    extra = set(pd.Series(values, dtype=object).dropna().unique()) - set(team_abbrs())
+    return pd.CategoricalDtype(team_abbrs() + sorted(extra))
+
+def enforce(df):
+    """
+    Returns df with the compact schema applied to the columns it has.
+    Integer columns with missing values are left as floats.
+    """
+    if df.empty:
+        return df
+    df = df.copy()
+    for col in INT_COLUMNS:
+        if col in df.columns and df[col].notna().all():
+            df[col] = df[col].astype(np.int32)
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col]).astype('datetime64[ns]')
+    if 'TEAM_ABBREVIATION' in df.columns:
+        df['TEAM_ABBREVIATION'] = df['TEAM_ABBREVIATION'].astype(team_abbr_dtype(df['TEAM_ABBREVIATION']))
+    return df
+
+def widen(values, decimals=4):
+    """
+    Float64 copy of float32 values for display, rounded to `decimals` to drop the
+    storage noise (1.05 is stored as 1.0499999), so .x5 ties format like float64.
+    """
+    return np.round(np.asarray(values, dtype=np.float64), decimals)
@@ -0,0 +1,273 @@
+import os
+import io
+import json
+import time
+import argparse
+import threading
+import numpy as np
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import utils
+import metrics
+import dvp
+import generate_report
+
+# Constants
+SERVER_HOST = os.environ.get('NBA_SERVER_HOST', '127.0.0.1') # 0.0.0.0 to share it on the network
+SERVER_PORT = int(os.environ.get('NBA_SERVER_PORT', '8000'))
+# Seconds between background refreshes (the API cache TTLs decide what is actually re-fetched)
+REFRESH_INTERVAL = float(os.environ.get('NBA_SERVER_REFRESH', str(utils.CACHE_DURATION)))
+# Rendered API responses kept per snapshot
+RESPONSE_CACHE_SIZE = 512
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"bad date '{value}', expected YYYY-MM-DD")
+
+class ReportSnapshot:
+    """
+    One refresh worth of report data, ready to answer requests without
+    recomputing: the rendered page, the JSON payload, and per-period stat
+    columns plus per-team row indices for the filter endpoints. Snapshots are
+    never modified once built; a refresh swaps in a new one.
+    """
+    def __init__(self, data, mode='json'):
+        self.data = data
+        self.built_at = time.time()
+        page = io.StringIO()
+        # Rendered in memory: refreshes must not fill the report's fragment store
+        generate_report.write_report(page, data, mode, use_fragments=False)
+        self.page = page.getvalue().encode('utf-8')
+
+        player_df = data['player_df']
+        schedule_index = data['schedule_index']
+        self.weeks = {w['id']: w for w in data['weeks']}
+        self.payload = generate_report.build_report_payload(
+            player_df, schedule_index, data['weeks'], data['def_ratings'], data['periods'], data['projected'], data['dvp'],
+            data.get('stat_metrics', generate_report.STAT_METRICS),
+        )
+
+        # Columns of the player endpoint, as object arrays so a filter is one fancy index
+        positions = np.array(dvp.POSITIONS + [''], dtype=object)
+        teams = player_df['TEAM_ABBREVIATION'].to_numpy(dtype=object)
+        self.players = {
+            'name': player_df['PLAYER_NAME'].to_numpy(dtype=object),
+            'team': teams,
+            'pos': positions[player_df['POS'].to_numpy()],
+        }
+        self.stats = {p: {m: np.array(values, dtype=object) for m, values in columns.items()} for p, columns in self.payload['stats'].items()}
+        self.team_players = {abbr: np.flatnonzero(teams == abbr) for abbr in np.unique(teams.astype(str))}
+        self.player_rows = data['player_rows']
+        self.responses = {}
+
+    def date_range(self, query):
+        """Dates of a request: ?week=Week2, or ?start=&end= (default: the whole horizon)."""
+        if 'week' in query:
+            week = self.weeks.get(query['week'])
+            if week is None:
+                raise ValueError(f"unknown week '{query['week']}'")
+            return week['start'], week['end']
+        index = self.data['schedule_index']
+        start = parse_date(query['start']) if 'start' in query else index.start_date
+        end = parse_date(query['end']) if 'end' in query else index.end_date
+        if end < start:
+            raise ValueError('end is before start')
+        return start, end
+
+    def player_table(self, query):
+        """
+        Players of the report (optionally of one team) with their games in the
+        date range and their stats for one period, as columns.
+        ?sort=<metric or games> orders them (descending), ?limit=N keeps the top N.
+        """
+        period = query.get('period', self.data['periods'][0])
+        if period not in self.stats:
+            raise ValueError(f"unknown period '{period}'")
+        start, end = self.date_range(query)
+        rows = np.arange(len(self.player_rows))
+        if 'team' in query:
+            if query['team'] not in self.team_players:
+                raise ValueError(f"unknown team '{query['team']}'")
+            rows = self.team_players[query['team']]
+
+        team_games = np.append(self.data['schedule_index'].games_between(start, end), 0) # Unknown team: 0
+        games = team_games[self.player_rows[rows]]
+        if 'sort' in query:
+            if query['sort'] == 'games':
+                key = games.astype(np.float64)
+            elif query['sort'] in self.stats[period]:
+                key = np.array([-np.inf if v is None else v for v in self.stats[period][query['sort']][rows]], dtype=np.float64)
+            else:
+                raise ValueError(f"unknown sort column '{query['sort']}'")
+            order = np.argsort(-key, kind='stable')
+            rows, games = rows[order], games[order]
+        if 'limit' in query:
+            limit = int(query['limit'])
+            rows, games = rows[:limit], games[:limit]
+
+        return {
+            'period': period,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'players': {col: values[rows].tolist() for col, values in self.players.items()},
+            'games': games.tolist(),
+            'stats': {m: values[rows].tolist() for m, values in self.stats[period].items()},
+        }
+
+    def team_table(self, query):
+        """Every team's games, light-slate games and back-to-backs in the date range."""
+        start, end = self.date_range(query)
+        index = self.data['schedule_index']
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'team': index.team_abbrs.tolist(),
+            'games': index.games_between(start, end).tolist(),
+            'offNights': index.light_slate_games(start, end).tolist(),
+            'b2b': index.back_to_backs(start, end).tolist(),
+        }
+
+    def week_list(self, query):
+        return [{'id': w['id'], 'label': w['label'], 'start': w['start'].isoformat(), 'end': w['end'].isoformat()} for w in self.data['weeks']]
+
+class ReportService:
+    """
+    Keeps a ReportSnapshot hot and refreshes it in a background thread every
+    refresh_interval seconds. Requests only ever read the current snapshot;
+    a failed refresh keeps serving the previous one.
+    """
+    def __init__(self, mode='json', refresh_interval=REFRESH_INTERVAL):
+        self.mode = mode
+        self.refresh_interval = refresh_interval
+        self.snapshot = None
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def refresh(self):
+        """Rebuilds the report data (through the API cache) and swaps in the new snapshot."""
+        with self._refresh_lock:
+            try:
+                utils.set_deadline(utils.RUN_DEADLINE)
+                with metrics.stage('refresh'):
+                    snapshot = ReportSnapshot(generate_report.build_report_data(), self.mode)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Refresh failed ({self.last_error}), still serving the previous data")
+                return False
+            self.snapshot = snapshot
+            self.last_error = None
+            print(f"🔄 Report data refreshed ({len(snapshot.player_rows)} players)")
+            return True
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self):
+        threading.Thread(target=self._refresh_loop, name='report-refresh', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self, query=None):
+        snapshot = self.snapshot
+        return {
+            'ready': snapshot is not None,
+            'built_at': datetime.fromtimestamp(snapshot.built_at).isoformat(timespec='seconds') if snapshot else None,
+            'age_s': round(time.time() - snapshot.built_at, 1) if snapshot else None,
+            'refresh_interval_s': self.refresh_interval,
+            'season': snapshot.data['season'] if snapshot else None,
+            'last_error': self.last_error,
+        }
+
+# Endpoint -> snapshot method returning a JSON-serializable answer
+API_ROUTES = {
+    '/api/players': ReportSnapshot.player_table,
+    '/api/teams': ReportSnapshot.team_table,
+    '/api/weeks': ReportSnapshot.week_list,
+    '/api/report': lambda snapshot, query: snapshot.payload,
+}
+
+class ReportHandler(BaseHTTPRequestHandler):
+    """
+    GET / (the report page), /api/players, /api/teams, /api/weeks, /api/report,
+    /api/status and /metrics. Everything is answered from memory.
+    """
+    server_version = 'FantasyNBAReport/2'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.server.service
+        if url.path == '/api/status':
+            return self._send(200, 'application/json', json.dumps(service.status()).encode('utf-8'))
+        if url.path == '/metrics':
+            return self._send(200, 'text/plain; version=0.0.4', metrics.to_prometheus(metrics.snapshot()).encode('utf-8'))
+        if url.path not in API_ROUTES and url.path not in ('/', '/index.html'):
+            return self._error(404, f"no such endpoint '{url.path}'")
+
+        snapshot = service.snapshot
+        if snapshot is None:
+            return self._error(503, 'report data is still loading')
+        if url.path in ('/', '/index.html'):
+            return self._send(200, 'text/html; charset=utf-8', snapshot.page)
+
+        # Answers only depend on the snapshot and the query, so they are memoized per snapshot
+        key = (url.path, tuple(sorted(query.items())))
+        body = snapshot.responses.get(key)
+        if body is None:
+            try:
+                body = json.dumps(API_ROUTES[url.path](snapshot, query), separators=(',', ':')).encode('utf-8')
+            except ValueError as e:
+                return self._error(400, str(e))
+            if len(snapshot.responses) >= RESPONSE_CACHE_SIZE:
+                snapshot.responses.clear()
+            snapshot.responses[key] = body
+        self._send(200, 'application/json', body)
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 503:
+            self.send_header('Retry-After', '5')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, mode='json', refresh_interval=REFRESH_INTERVAL):
+    """
+    Loads the report data once, then serves it until interrupted while a
+    background thread refreshes it every refresh_interval seconds.
+    """
+    service = ReportService(mode, refresh_interval)
+    print("Loading report data...")
+    service.refresh()
+    service.start()
+
+    httpd = ThreadingHTTPServer((host, port), ReportHandler)
+    httpd.service = service
+    print(f"🌐 Serving the report on http://{host}:{port}/ (refresh every {refresh_interval:.0f}s)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve the fantasy NBA report and its JSON API from memory.')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--mode', choices=['json', 'html'], default='json', help='Page rendering mode (see REPORT_MODE)')
+    parser.add_argument('--refresh', type=float, default=REFRESH_INTERVAL, help='Seconds between background refreshes')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.mode, args.refresh)
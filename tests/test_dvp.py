@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import dvp
+import gamelog
+import schema
+
+SEASON = '2025-26'
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(gamelog, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+def make_logs(n_dates=6, n_players=40, seed=0):
+    """Random player-game rows over n_dates consecutive days, a few games a night."""
+    rng = np.random.default_rng(seed)
+    teams = schema.team_abbrs()
+    rows = []
+    for day in range(n_dates):
+        game_date = (pd.Timestamp('2025-11-01') + pd.Timedelta(days=day)).strftime('%Y-%m-%d')
+        for g, pair in enumerate(rng.permutation(len(teams))[:8].reshape(-1, 2)):
+            game_id = f'00225{day:03d}{g:02d}'
+            for side, (team, opp) in enumerate([(pair[0], pair[1]), (pair[1], pair[0])]):
+                matchup = f"{teams[team]} {'vs.' if side == 0 else '@'} {teams[opp]}"
+                for pid in rng.choice(n_players, 3, replace=False):
+                    stats = {c: int(rng.integers(0, 10)) for c in dvp.DVP_COLUMNS}
+                    rows.append(dict(PLAYER_ID=1000 + int(pid), PLAYER_NAME=f'P{pid}', TEAM_ID=team,
+                                     TEAM_ABBREVIATION=teams[team], GAME_ID=game_id, GAME_DATE=game_date,
+                                     MATCHUP=matchup, MIN=30.0, **stats))
+    return pd.DataFrame(rows, columns=gamelog.LOG_COLUMNS)
+
+def positions(n_players=40):
+    listed = ['G', 'G-F', 'F', 'F-C', 'C', '']
+    return {1000 + i: listed[i % len(listed)] for i in range(n_players)}
+
+def brute_force(logs, player_positions):
+    """(teams x positions x categories) per-game stats allowed, straight from the rows with pandas."""
+    teams = schema.team_abbrs()
+    logs = logs.assign(OPP=logs['MATCHUP'].str.split().str[-1])
+    group = logs['PLAYER_ID'].map(player_positions).fillna('').str[:1].map({p: i for i, p in enumerate(dvp.POSITIONS)})
+    games = logs.drop_duplicates(['GAME_ID', 'OPP']).groupby('OPP').size()
+    out = np.full((len(teams), dvp.ALL + 1, len(dvp.DVP_COLUMNS)), np.nan)
+    for t, team in enumerate(teams):
+        if team not in games.index:
+            continue
+        mine = logs['OPP'] == team
+        for k in range(dvp.ALL + 1):
+            rows = logs[mine & (group == k)] if k < dvp.ALL else logs[mine]
+            out[t, k] = rows[dvp.DVP_COLUMNS].sum().to_numpy(dtype=np.float64) / games[team]
+    return out
+
+def test_incremental_updates_match_full_rebuild_and_brute_force(data_dir):
+    logs = make_logs()
+    pos = positions()
+
+    # Sync one date at a time, updating the store after each (the daily path)
+    for game_date, rows in logs.groupby('GAME_DATE'):
+        gamelog.write_games(SEASON, rows)
+        incremental = dvp.update(SEASON, pos)
+
+    # Late games on the newest date rewrite its partition: picked up as well
+    last_date = logs['GAME_DATE'].max()
+    late = make_logs(n_dates=1, seed=1).assign(GAME_DATE=last_date)
+    late['GAME_ID'] = late['GAME_ID'].str.replace('00225', '00299')
+    logs = pd.concat([logs, late], ignore_index=True)
+    gamelog.write_games(SEASON, logs[logs['GAME_DATE'] == last_date])
+    incremental = dvp.update(SEASON, pos)
+
+    os.remove(dvp.store_path(SEASON))
+    rebuilt = dvp.update(SEASON, pos)
+
+    expected = brute_force(logs, pos)
+    np.testing.assert_allclose(incremental.allowed, rebuilt.allowed, equal_nan=True)
+    np.testing.assert_allclose(incremental.allowed, expected, equal_nan=True)
+    np.testing.assert_array_equal(incremental.rank, rebuilt.rank)
+
+def test_positions_apply_at_read_time(data_dir):
+    logs = make_logs(n_dates=3)
+    gamelog.write_games(SEASON, logs)
+    dvp.update(SEASON, positions())
+
+    # A changed listed position needs no rebuild of the stored sums
+    moved = {**positions(), 1000: 'C'}
+    np.testing.assert_allclose(dvp.update(SEASON, moved).allowed, brute_force(logs, moved), equal_nan=True)
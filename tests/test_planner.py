@@ -0,0 +1,57 @@
+import itertools
+import numpy as np
+import pytest
+
+import planner
+
+def brute_force(values, init_values, budget, allowed):
+    """Best holder sequence by enumeration: at most budget adds, no re-adds, initial holder never re-added."""
+    n_cand, n_days = values.shape
+    best = -np.inf
+    for holders in itertools.product(range(-1, n_cand), repeat=n_days):
+        held, adds, prev, ok = set(), 0, -1, True
+        for h in holders:
+            if h != prev:
+                if h < 0 or h in held or not allowed[h]:
+                    ok = False
+                    break
+                held.add(h)
+                adds += 1
+            prev = h
+        if ok and adds <= budget:
+            best = max(best, sum(init_values[d] if h < 0 else values[h, d] for d, h in enumerate(holders)))
+    return best
+
+def holders_value(values, init_values, holders):
+    return sum(init_values[d] if h < 0 else values[h, d] for d, h in enumerate(holders))
+
+@pytest.mark.parametrize('seed', range(300))
+def test_plan_slot_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n_cand, n_days, budget = int(rng.integers(1, 4)), int(rng.integers(1, 7)), int(rng.integers(0, 4))
+    # Sparse integer values: many ties and idle days, where re-adds pay off
+    values = rng.integers(0, 4, (n_cand, n_days)) * rng.integers(0, 2, (n_cand, n_days)).astype(np.float64)
+    init_values = rng.integers(0, 3, n_days).astype(np.float64)
+    allowed = rng.random(n_cand) < 0.85
+
+    value, holders = planner.plan_slot(values, init_values, budget, allowed)
+
+    assert value == pytest.approx(brute_force(values, init_values, budget, allowed))
+    assert holders_value(values, init_values, holders) == pytest.approx(value)
+    assert planner._first_readd(holders) is None
+    switches = sum(1 for d, h in enumerate(holders) if h != (holders[d - 1] if d else -1))
+    assert switches <= budget
+
+def test_plan_slot_never_re_adds_a_dropped_player():
+    # Candidate 0 plays Monday and Sunday, candidate 1 midweek: holding 0, then 1,
+    # then 0 again (16) would be best, but 0 cannot come back once dropped
+    values = np.array([
+        [5, 0, 0, 0, 0, 0, 5],
+        [0, 0, 3, 3, 0, 0, 0],
+    ], dtype=np.float64)
+    value, holders = planner.plan_slot(values, np.zeros(7), 3, np.ones(2, dtype=bool))
+    assert value == 11
+    assert planner._first_readd(holders) is None
+
+def test_plan_slot_empty_week():
+    assert planner.plan_slot(np.zeros((3, 0)), np.zeros(0), 2, np.ones(3, dtype=bool)) == (0.0, [])
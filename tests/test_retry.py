@@ -0,0 +1,122 @@
+import os
+import time
+import pandas as pd
+import pytest
+from requests.exceptions import ConnectionError
+
+import cache
+import metrics
+import utils
+
+class Clock:
+    """Fake monotonic clock: sleeping advances it instantly and is recorded."""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FailingEndpoint:
+    """Endpoint whose requests fail with a connection error, counting attempts."""
+    def __init__(self):
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        raise ConnectionError('stats.nba.com unreachable')
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    monkeypatch.setattr(utils.random, 'uniform', lambda lo, hi: hi) # Full jitter at its upper bound
+    monkeypatch.setattr(utils, '_breakers', {})
+    # Fresh limiters, so fake-clock slots never leak into other tests
+    monkeypatch.setattr(utils, '_host_limiters', {h: utils.RateLimiter(i) for h, i in utils.HOST_MIN_INTERVAL.items()})
+    utils.set_deadline(None)
+    yield clock
+    utils.set_deadline(None)
+
+def test_failing_call_uses_every_retry(clock):
+    endpoint = FailingEndpoint()
+    with pytest.raises(ConnectionError):
+        utils.retry_api_call(endpoint, retries=5, name='Failing')
+    assert endpoint.attempts == 5
+    assert clock.sleeps == [2, 4, 8, 16] # RETRY_BASE_DELAY * 2 ** attempt, under RETRY_MAX_DELAY
+
+def test_backoff_is_capped(clock):
+    endpoint = FailingEndpoint()
+    with pytest.raises(ConnectionError):
+        utils.retry_api_call(endpoint, retries=7)
+    assert clock.sleeps == [2, 4, 8, 16, utils.RETRY_MAX_DELAY, utils.RETRY_MAX_DELAY]
+
+def test_backoff_stops_at_the_deadline(clock):
+    utils.set_deadline(20)
+    endpoint = FailingEndpoint()
+    with pytest.raises(ConnectionError):
+        utils.retry_api_call(endpoint, retries=5, name='Failing')
+    # 2 + 4 sleeps leave 14s; the next 8s sleep (+1s for the request) still fits, 16s does not
+    assert clock.sleeps == [2, 4, 8]
+    assert endpoint.attempts == 4
+
+def test_breaker_opens_after_threshold_failed_calls(clock):
+    endpoint = FailingEndpoint()
+    for _ in range(utils.BREAKER_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            utils.retry_api_call(endpoint, retries=2, name='Failing')
+    assert endpoint.attempts == 2 * utils.BREAKER_THRESHOLD
+
+    with pytest.raises(utils.CircuitOpen):
+        utils.retry_api_call(endpoint, retries=2, name='Failing')
+    assert endpoint.attempts == 2 * utils.BREAKER_THRESHOLD # Rejected without a request
+
+    # After the cooldown one trial call goes through; success closes the breaker
+    clock.now += utils.BREAKER_COOLDOWN
+    assert utils.retry_api_call(lambda: 'ok', name='Failing') == 'ok'
+    assert not utils.get_breaker('Failing').is_open()
+
+def test_unretried_error_resolves_half_open_trial(clock):
+    breaker = utils.get_breaker('Failing')
+    for _ in range(utils.BREAKER_THRESHOLD):
+        breaker.record_failure()
+    clock.now += utils.BREAKER_COOLDOWN
+
+    def html_error_page():
+        raise ValueError('Expecting value: line 1 column 1')
+    with pytest.raises(ValueError):
+        utils.retry_api_call(html_error_page, name='Failing')
+    assert breaker.is_open() and not breaker._trial
+
+    clock.now += utils.BREAKER_COOLDOWN
+    assert utils.retry_api_call(lambda: 'ok', name='Failing') == 'ok'
+
+def test_interrupt_is_not_an_endpoint_failure(clock):
+    def interrupted():
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        utils.retry_api_call(interrupted, name='Failing')
+    assert utils.get_breaker('Failing').failures == 0
+
+def test_failed_request_falls_back_to_stale_cache(clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    params = {'season': '2025-26'}
+    stale = pd.DataFrame({'TEAM_ID': [1], 'DEF_RATING': [110.5]})
+    key = cache.make_key('LeagueDashTeamStats', params)
+    cache.store(key, 'LeagueDashTeamStats', params, [stale])
+    old = os.path.getmtime(cache._path(key)) - 2 * utils.CACHE_TTL['LeagueDashTeamStats']
+    os.utime(cache._path(key), (old, old))
+
+    endpoint = FailingEndpoint()
+    metrics.reset()
+    with metrics.stage('fetch'):
+        frames = utils.cached_api_call('LeagueDashTeamStats', params, endpoint)
+    assert endpoint.attempts == 5
+    pd.testing.assert_frame_equal(frames[0], stale)
+    assert metrics.snapshot()['fetch']['stale_hits'] == 1
+    assert metrics.snapshot()['fetch']['retries'] == 4
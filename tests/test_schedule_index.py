@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from nba_api.stats.static import teams
+
+import utils
+
+SEASON_START = date(2025, 10, 21)
+SEASON_END = date(2025, 11, 30)
+
+def make_schedule(start, end, seed):
+    """LeagueGameFinder rows (one per team per game), 0-15 games a night from start to end."""
+    rng = np.random.default_rng(seed)
+    nba_teams = sorted(teams.get_teams(), key=lambda t: t['id'])
+    rows = []
+    d = start
+    while d <= end:
+        order = rng.permutation(len(nba_teams))[:2 * int(rng.integers(0, 16))]
+        for home, away in zip(order[::2], order[1::2]):
+            h, a = nba_teams[home], nba_teams[away]
+            rows.append((h['id'], h['abbreviation'], d.isoformat(), f"{h['abbreviation']} vs. {a['abbreviation']}"))
+            rows.append((a['id'], a['abbreviation'], d.isoformat(), f"{a['abbreviation']} @ {h['abbreviation']}"))
+        d += timedelta(days=1)
+    return pd.DataFrame(rows, columns=['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP'])
+
+def brute_force(schedule, team, start, end, light_slate_max=utils.LIGHT_SLATE_MAX_GAMES):
+    """(games, back-to-backs, light-slate games) of team from start to end, counted row by row."""
+    in_season = [date.fromisoformat(d) for d in schedule['GAME_DATE']]
+    nights = {}
+    for d in in_season:
+        if SEASON_START <= d <= SEASON_END:
+            nights[d] = nights.get(d, 0) + 1
+    played = {d for d, t in zip(in_season, schedule['TEAM_ABBREVIATION']) if t == team and SEASON_START <= d <= SEASON_END}
+    games = b2b = light = 0
+    for d in played:
+        if start <= d <= end:
+            games += 1
+            if 0 < nights[d] // 2 <= light_slate_max:
+                light += 1
+            if start <= d - timedelta(days=1) and d - timedelta(days=1) in played:
+                b2b += 1
+    return games, b2b, light
+
+@pytest.fixture(scope='module')
+def schedule():
+    # Rows outside the season are dropped by the index
+    return make_schedule(SEASON_START - timedelta(days=5), SEASON_END + timedelta(days=5), seed=0)
+
+@pytest.fixture(scope='module')
+def index(schedule):
+    return utils.ScheduleIndex(schedule, SEASON_START, SEASON_END)
+
+def random_ranges(n, seed):
+    """Ranges inside, across and outside the season, some of them reversed."""
+    rng = np.random.default_rng(seed)
+    span = (SEASON_END - SEASON_START).days
+    for _ in range(n):
+        start = SEASON_START + timedelta(days=int(rng.integers(-10, span + 10)))
+        yield start, start + timedelta(days=int(rng.integers(-5, 20)))
+
+BOUNDARY_RANGES = [
+    (SEASON_START, SEASON_END),
+    (SEASON_START, SEASON_START),
+    (SEASON_END, SEASON_END),
+    (SEASON_START - timedelta(days=3), SEASON_START + timedelta(days=2)),
+    (SEASON_END - timedelta(days=2), SEASON_END + timedelta(days=3)),
+    (SEASON_START - timedelta(days=9), SEASON_START - timedelta(days=1)),
+    (SEASON_END + timedelta(days=1), SEASON_END + timedelta(days=9)),
+    (SEASON_END, SEASON_START),
+    (SEASON_END + timedelta(days=5), SEASON_START - timedelta(days=5)),
+]
+
+@pytest.mark.parametrize('start,end', BOUNDARY_RANGES + list(random_ranges(60, seed=1)))
+def test_counts_match_brute_force(schedule, index, start, end):
+    all_games = index.games_between(start, end)
+    all_b2b = index.back_to_backs(start, end)
+    all_light = index.light_slate_games(start, end)
+    for abbr in sorted(set(schedule['TEAM_ABBREVIATION'])):
+        expected = brute_force(schedule, abbr, start, end)
+        row = index.team_index(abbr)
+        assert (index.games_between(start, end, abbr), index.back_to_backs(start, end, abbr),
+                index.light_slate_games(start, end, abbr)) == expected
+        assert (all_games[row], all_b2b[row], all_light[row]) == expected
+
+def test_reversed_range_is_empty(index):
+    for count in (index.games_between, index.back_to_backs, index.light_slate_games):
+        assert (count(SEASON_END, SEASON_START) == 0).all()
+        assert count(SEASON_START + timedelta(days=1), SEASON_START, 'LAL') == 0
+
+@pytest.mark.parametrize('offset', [-10, -1, 0, 1, 20, 40, 41, 60])
+def test_remaining_games(schedule, index, offset):
+    from_date = SEASON_START + timedelta(days=offset)
+    remaining = index.remaining_games(from_date)
+    for abbr in sorted(set(schedule['TEAM_ABBREVIATION'])):
+        expected = brute_force(schedule, abbr, from_date, SEASON_END)[0]
+        assert index.remaining_games(from_date, abbr) == expected
+        assert remaining[index.team_index(abbr)] == expected
+
+def test_team_id_and_abbreviation_agree(index):
+    lal = next(t for t in teams.get_teams() if t['abbreviation'] == 'LAL')
+    assert index.games_between(SEASON_START, SEASON_END, lal['id']) == index.games_between(SEASON_START, SEASON_END, 'LAL')
@@ -0,0 +1,97 @@
+import math
+import statistics
+import numpy as np
+import pandas as pd
+import pytest
+
+import valuation
+from valuation import ValuationEngine
+
+def make_stats(n_players=170):
+    """Fixed per-game lines; total minutes (MIN x GP) fall with the player index, so the pool is the first 156."""
+    rows = []
+    for i in range(n_players):
+        fga = 4 + (i * 7) % 17
+        fta = (i * 5) % 9
+        rows.append(dict(
+            PLAYER_ID=100 + i, PLAYER_NAME=f'P{i}', GP=60, MIN=40.0 - i * 0.2,
+            PTS=5 + (i * 13) % 29, REB=1 + (i * 3) % 12, AST=(i * 7) % 10, STL=(i % 5) * 0.4,
+            BLK=(i % 7) * 0.3, FG3M=(i % 4) * 0.8, TOV=0.5 + (i * 11) % 5,
+            FGM=fga * (0.38 + (i % 10) * 0.03), FGA=fga, FTM=fta * (0.6 + (i % 4) * 0.1), FTA=fta,
+        ))
+    df = pd.DataFrame(rows)
+    df['FG_PCT'] = df['FGM'] / df['FGA']
+    df['FT_PCT'] = (df['FTM'] / df['FTA']).fillna(0.0)
+    return df
+
+def by_hand(df, pool_size=valuation.POOL_SIZE):
+    """{player id: {category: z}}: pool by total minutes, then mean and population std per category."""
+    pool = df.assign(TOTAL=df['MIN'] * df['GP']).sort_values('TOTAL', ascending=False, kind='stable').head(pool_size)
+    pool = pool[pool['TOTAL'] > 0]
+    raw = {}
+    for cat in valuation.CATEGORIES:
+        if cat in valuation.PCT_VOLUME:
+            makes, attempts = valuation.PCT_VOLUME[cat]
+            pool_pct = sum(pool[makes]) / sum(pool[attempts])
+            raw[cat] = {pid: m - pool_pct * a for pid, m, a in zip(df['PLAYER_ID'], df[makes], df[attempts])}
+        else:
+            raw[cat] = dict(zip(df['PLAYER_ID'], df[cat]))
+    z = {pid: {} for pid in df['PLAYER_ID']}
+    for cat, values in raw.items():
+        pool_values = [values[pid] for pid in pool['PLAYER_ID']]
+        mean, std = statistics.fmean(pool_values), statistics.pstdev(pool_values)
+        sign = -1 if cat in valuation.NEGATIVE_CATEGORIES else 1
+        for pid in z:
+            z[pid][cat] = sign * (values[pid] - mean) / std
+    return z
+
+def test_zscores_against_the_pool():
+    df = make_stats()
+    engine = ValuationEngine({'Season': df})
+    expected = by_hand(df)
+    rows = np.searchsorted(engine.player_ids, df['PLAYER_ID'].to_numpy())
+    assert engine.in_pool[0, rows].tolist() == [i < valuation.POOL_SIZE for i in range(len(df))]
+    for row, pid in zip(rows, df['PLAYER_ID']):
+        for k, cat in enumerate(engine.categories):
+            assert engine.zscores[0, row, k] == pytest.approx(expected[pid][cat], rel=1e-9, abs=1e-12)
+
+def test_percentages_are_volume_weighted():
+    # Player 1 shoots 60% on 2 attempts, player 2 55% on 20, player 3 44.5% on 40
+    df = pd.DataFrame({
+        'PLAYER_ID': [1, 2, 3], 'GP': [10] * 3, 'MIN': [30.0] * 3,
+        'FGM': [1.2, 11.0, 17.8], 'FGA': [2.0, 20.0, 40.0], 'FG_PCT': [0.6, 0.55, 0.445],
+    })
+    engine = ValuationEngine({'Season': df}, categories=['FG_PCT'])
+    pool_pct = 30.0 / 62.0
+    impact = np.array([1.2 - pool_pct * 2, 11.0 - pool_pct * 20, 17.8 - pool_pct * 40])
+    np.testing.assert_allclose(engine.zscores[0, :, 0], (impact - impact.mean()) / impact.std())
+    # Makes above the pool's rate, not the raw percentage: player 2 is worth more than player 1
+    assert engine.zscores[0, 1, 0] > engine.zscores[0, 0, 0] > engine.zscores[0, 2, 0]
+
+def test_value_rank_and_punt():
+    season = pd.DataFrame({
+        'PLAYER_ID': [1, 2, 3, 4], 'GP': [10] * 4, 'MIN': [30.0] * 4,
+        'PTS': [10.0, 20.0, 30.0, 20.0], 'TOV': [1.0, 2.0, 6.0, 3.0],
+    })
+    last7 = season[season['PLAYER_ID'] != 4] # Player 4 has no games in L7
+    engine = ValuationEngine({'Season': season, 'L7': last7}, categories=['PTS', 'TOV'])
+
+    # Season pool: PTS mean 20, std 50**0.5; TOV mean 3, std 3.5**0.5 (turnovers count against)
+    pts = [(p - 20) / math.sqrt(50) for p in [10, 20, 30, 20]]
+    tov = [(3 - t) / math.sqrt(3.5) for t in [1, 2, 6, 3]]
+    total, rank = engine.values()
+    np.testing.assert_allclose(total[0], [p + t for p, t in zip(pts, tov)])
+    assert rank[0].tolist() == [4, 1, 3, 2]
+
+    total, rank = engine.values(punt=['TOV'])
+    np.testing.assert_allclose(total[0], pts)
+    assert rank[0].tolist() == [4, 2, 1, 3] # Ties keep player order
+
+    out = engine.apply({'Season': season, 'L7': last7}, punt=['TOV'])
+    assert out['Season']['RANK'].tolist() == [4, 2, 1, 3]
+    np.testing.assert_allclose(out['Season']['VALUE'], pts, rtol=1e-6)
+    # L7 has its own pool of three; player 4 is left out of its ranking
+    pts7 = [(p - 20) / math.sqrt(200 / 3) for p in [10, 20, 30]]
+    np.testing.assert_allclose(out['L7']['VALUE'], pts7, rtol=1e-6)
+    assert out['L7']['RANK'].tolist() == [3, 2, 1]
+    assert np.isnan(engine.values()[1][1, 3])
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from windows import WindowEngine, STAT_COLUMNS, OUTPUT_COLUMNS
+
+FIRST_DAY = date(2025, 10, 21)
+N_DAYS = 60
+
+def make_logs(seed, n_players=25):
+    """Player-game rows in random order; some players are traded mid-season, some never shoot free throws."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for p in range(n_players):
+        n_games = int(rng.integers(1, 40))
+        days = np.sort(rng.choice(N_DAYS, n_games, replace=False))
+        trade_day = int(rng.integers(0, N_DAYS))
+        for day in days:
+            team = p % 30 if day < trade_day else (p + 7) % 30
+            fga = int(rng.integers(0, 20))
+            fta = int(rng.integers(0, 10)) if p % 5 else 0
+            rows.append(dict(
+                PLAYER_ID=1000 + p, PLAYER_NAME=f'Player {p}', TEAM_ID=1610612737 + team,
+                TEAM_ABBREVIATION=f'T{team:02d}', GAME_DATE=np.datetime64(FIRST_DAY + timedelta(days=int(day)), 'D'),
+                MIN=float(rng.uniform(5, 40)), PTS=int(rng.integers(0, 40)), REB=int(rng.integers(0, 15)),
+                AST=int(rng.integers(0, 12)), STL=int(rng.integers(0, 4)), BLK=int(rng.integers(0, 4)),
+                FG3M=int(rng.integers(0, 5)), TOV=int(rng.integers(0, 6)),
+                FGM=int(rng.binomial(fga, 0.45)), FGA=fga, FTM=int(rng.binomial(fta, 0.8)), FTA=fta,
+            ))
+    df = pd.DataFrame(rows)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+def brute_force(logs, window, as_of):
+    """Per-game averages over the window with plain pandas filtering, one player at a time."""
+    dates = pd.to_datetime(logs['GAME_DATE'])
+    if as_of is not None:
+        logs = logs[dates <= pd.Timestamp(as_of)]
+        dates = dates[dates <= pd.Timestamp(as_of)]
+    if window is not None and window[0] == 'days':
+        logs = logs[dates >= pd.Timestamp(as_of) - pd.Timedelta(days=window[1])]
+    rows = []
+    for pid, games in logs.groupby('PLAYER_ID'):
+        games = games.sort_values('GAME_DATE')
+        if window is not None and window[0] == 'games':
+            games = games.tail(window[1])
+        sums = games[STAT_COLUMNS].sum()
+        row = {'PLAYER_ID': pid, 'PLAYER_NAME': games['PLAYER_NAME'].iloc[-1], 'TEAM_ID': games['TEAM_ID'].iloc[-1],
+               'TEAM_ABBREVIATION': games['TEAM_ABBREVIATION'].iloc[-1], 'GP': len(games)}
+        row.update(sums / len(games))
+        # Percentages from summed makes and attempts, not an average of per-game percentages
+        row['FG_PCT'] = sums['FGM'] / sums['FGA'] if sums['FGA'] else 0.0
+        row['FT_PCT'] = sums['FTM'] / sums['FTA'] if sums['FTA'] else 0.0
+        rows.append(row)
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+WINDOWS = [None, ('days', 0), ('days', 7), ('days', 14), ('days', 30), ('days', 365), ('games', 1), ('games', 10), ('games', 100)]
+AS_OF = [FIRST_DAY - timedelta(days=30), FIRST_DAY - timedelta(days=1), FIRST_DAY, FIRST_DAY + timedelta(days=3),
+         FIRST_DAY + timedelta(days=29), FIRST_DAY + timedelta(days=N_DAYS - 1), FIRST_DAY + timedelta(days=N_DAYS + 20)]
+
+def check(actual, expected):
+    actual = actual.sort_values('PLAYER_ID').reset_index(drop=True)
+    expected = expected.sort_values('PLAYER_ID').reset_index(drop=True)
+    assert list(actual.columns) == OUTPUT_COLUMNS
+    assert len(actual) == len(expected)
+    if expected.empty:
+        return
+    for col in ['PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP']:
+        assert actual[col].tolist() == expected[col].tolist(), col
+    np.testing.assert_allclose(actual[STAT_COLUMNS + ['FG_PCT', 'FT_PCT']].to_numpy(dtype=float),
+                               expected[STAT_COLUMNS + ['FG_PCT', 'FT_PCT']].to_numpy(dtype=float), rtol=1e-9, atol=1e-12)
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('as_of', AS_OF)
+def test_windows_match_brute_force(seed, as_of):
+    logs = make_logs(seed)
+    engine = WindowEngine(logs)
+    results = engine.windows({i: w for i, w in enumerate(WINDOWS)}, as_of=as_of)
+    for i, window in enumerate(WINDOWS):
+        check(results[i], brute_force(logs, window, as_of))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_no_as_of_covers_all_games(seed):
+    logs = make_logs(seed)
+    engine = WindowEngine(logs)
+    check(engine.window(None), brute_force(logs, None, None))
+    check(engine.window(('games', 10)), brute_force(logs, ('games', 10), None))
+
+def test_stat_periods():
+    # The windows the report asks for
+    logs = make_logs(3)
+    as_of = FIRST_DAY + timedelta(days=40)
+    results = WindowEngine(logs).windows({period: window for period, (_, window) in utils.STAT_PERIODS.items()}, as_of=as_of)
+    for period, (_, window) in utils.STAT_PERIODS.items():
+        check(results[period], brute_force(logs, window, as_of))
+
+def test_percentages_weight_by_attempts():
+    # 1/1 then 0/9: 10% from the totals, not the 50% average of the two games
+    logs = pd.DataFrame([
+        dict(PLAYER_ID=1, PLAYER_NAME='A', TEAM_ID=1, TEAM_ABBREVIATION='AAA', GAME_DATE=np.datetime64('2025-11-01'),
+             **{**dict.fromkeys(STAT_COLUMNS, 0), 'FGM': 1, 'FGA': 1, 'FTM': 3, 'FTA': 4}),
+        dict(PLAYER_ID=1, PLAYER_NAME='A', TEAM_ID=1, TEAM_ABBREVIATION='AAA', GAME_DATE=np.datetime64('2025-11-02'),
+             **{**dict.fromkeys(STAT_COLUMNS, 0), 'FGA': 9}),
+    ])
+    df = WindowEngine(logs).window(None)
+    assert df['FG_PCT'].iloc[0] == pytest.approx(0.1)
+    assert df['FT_PCT'].iloc[0] == pytest.approx(0.75)
+    assert df['FGA'].iloc[0] == pytest.approx(5.0)
+
+def test_empty_logs():
+    df = WindowEngine(make_logs(0).iloc[:0]).window(('days', 7), as_of=FIRST_DAY)
+    assert df.empty and list(df.columns) == OUTPUT_COLUMNS
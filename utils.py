@@ -1,139 +1,468 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-from nba_api.stats.endpoints import leaguegamefinder, leaguedashplayerstats, leaguedashteamstats
-from nba_api.stats.static import teams
+import os
 import time
-from requests.exceptions import ReadTimeout, ConnectionError, RequestException
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cache
+import dvp
+import gamelog
+import metrics
+import schema
+from windows import WindowEngine
+
+# nba_api (and requests under it) is imported inside the functions that hit
+# the API, so rendering from a stored snapshot never loads it.
 
 # Constants
 CACHE_DURATION = 3600 # 1 hour
+# Per-endpoint cache freshness (seconds). The schedule and team ratings barely
+# move during a day; player stats change after every game night.
+CACHE_TTL = {
+    'LeagueGameFinder': 6 * CACHE_DURATION,
+    'ScheduleLeagueV2': 24 * CACHE_DURATION, # Also how often the stored season schedule is re-checked
+    'LeagueDashPlayerStats': CACHE_DURATION,
+    'LeagueDashTeamStats': 6 * CACHE_DURATION,
+    'LeagueGameLog': CACHE_DURATION,
+    'PlayerIndex': 24 * CACHE_DURATION,
+}
+# Player stat periods: key -> (button label, window). A window is ('days', N)
+# back from today, ('games', N) for each player's last N games, or None for
+# the full season. Windows are computed locally, so adding one is cheap.
+STAT_PERIODS = {
+    'Season': ('Season Avg', None),
+    'L7': ('Last 7 Days', ('days', 7)),
+    'L14': ('Last 14 Days', ('days', 14)),
+    'L30': ('Last 30 Days', ('days', 30)),
+    'G10': ('Last 10 Games', ('games', 10)),
+}
+
+# Fetch scheduling: max concurrent requests, and minimum seconds between
+# request starts per host (stats.nba.com throttles bursts aggressively)
+MAX_IN_FLIGHT = 5
+# A night with at most this many NBA games is a light slate ("off-night"):
+# streamers playing then are less likely to be blocked by a full lineup
+LIGHT_SLATE_MAX_GAMES = 7
+
+NBA_STATS_HOST = 'stats.nba.com'
+HOST_MIN_INTERVAL = {NBA_STATS_HOST: 0.5}
+
+# Retry policy: exponential backoff with full jitter, capped per sleep, and a
+# deadline for the whole run (NBA_DEADLINE seconds) that also caps request timeouts.
+REQUEST_TIMEOUT = 120
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 30
+RUN_DEADLINE = float(os.environ.get('NBA_DEADLINE', '600'))
+# Circuit breaker: after this many consecutive failed calls (each after all its
+# retries) an endpoint is skipped (stale cache served instead) until the cooldown has passed.
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 300
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Accept-Language': 'en-US,en;q=0.9',
     'Referer': 'https://www.nba.com/'
 }
 
-def retry_api_call(func, retries=5, delay=5):
+class RateLimiter:
+    """
+    Spaces out request starts to at most one every `interval` seconds.
+    Thread-safe; callers block in wait() until their slot comes up.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class DeadlineExceeded(Exception):
+    """Raised when the run deadline leaves no time for another request."""
+
+class CircuitOpen(Exception):
+    """Raised when an endpoint's circuit breaker is rejecting requests."""
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker. Closed: requests go through. After `threshold`
+    consecutive failures it opens and rejects requests for `cooldown` seconds,
+    then lets a single trial request through (half-open): success closes it,
+    failure opens it again.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._trial = True # Half-open: one trial request
+            return True
+
+    def is_open(self):
+        with self._lock:
+            return self.opened_at is not None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
+
+_deadline = None
+
+def set_deadline(seconds=RUN_DEADLINE):
+    """
+    Starts the run deadline: no request or retry sleep goes past it.
+    None removes it.
+    """
+    global _deadline
+    _deadline = time.monotonic() + seconds if seconds is not None else None
+
+def time_left():
+    return _deadline - time.monotonic() if _deadline is not None else float('inf')
+
+def request_timeout():
+    """The per-request timeout: REQUEST_TIMEOUT, shortened near the deadline."""
+    return max(1, min(REQUEST_TIMEOUT, time_left()))
+
+_in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+_host_limiters = {host: RateLimiter(interval) for host, interval in HOST_MIN_INTERVAL.items()}
+
+def throttled(func, host=NBA_STATS_HOST):
     """
-    Wraps an API call with retry logic.
+    Wraps a request so it respects the in-flight cap and the host's rate limit.
+    The slot is only held for the request itself, not for retry sleeps.
     """
+    limiter = _host_limiters.get(host)
+
+    def call():
+        with _in_flight:
+            if limiter:
+                limiter.wait()
+            return func()
+    return call
+
+def backoff_delay(attempt, delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """
+    Sleep before retry number attempt (0-based): full jitter over an
+    exponentially growing, capped window, so parallel callers spread out.
+    """
+    return random.uniform(0, min(max_delay, delay * 2 ** attempt))
+
+def _call_with_retries(func, retries, delay, name):
+    """retry_api_call's loop: up to retries attempts with backoff, bounded by the run deadline."""
+    from requests.exceptions import ReadTimeout, ConnectionError, RequestException
     for i in range(retries):
+        if time_left() < 1:
+            raise DeadlineExceeded(f"No time left for {name or 'request'}")
         try:
-            return func()
+            result = func()
+            metrics.add(bytes=metrics.response_bytes(result))
+            return result
         except (ReadTimeout, ConnectionError, RequestException) as e:
             print(f"  ⚠️ API Error (Attempt {i+1}/{retries}): {e}")
-            if i < retries - 1:
-                sleep_time = delay * (i + 1)
-                print(f"  ⏳ Retrying in {sleep_time}s...")
-                time.sleep(sleep_time)
-            else:
-                print("  ❌ Max retries reached.")
+            sleep_time = backoff_delay(i, delay)
+            if i == retries - 1 or sleep_time + 1 > time_left():
+                print("  ❌ Max retries reached." if i == retries - 1 else "  ❌ Run deadline reached.")
                 raise e
+            print(f"  ⏳ Retrying in {sleep_time:.1f}s...")
+            metrics.add(retries=1, backoff_s=sleep_time)
+            time.sleep(sleep_time)
 
+def retry_api_call(func, retries=5, delay=RETRY_BASE_DELAY, name=None):
+    """
+    Wraps an API call with retry logic: exponential backoff with jitter, bounded
+    by the run deadline. With a name, the endpoint's circuit breaker is consulted
+    once per call and told its outcome: a call failing after all its retries (or
+    with an error that is not retried, e.g. the JSONDecodeError of an HTML error
+    page) counts as one failure.
+    """
+    if time_left() < 1:
+        raise DeadlineExceeded(f"No time left for {name or 'request'}")
+    breaker = get_breaker(name) if name else None
+    if breaker and not breaker.allow():
+        raise CircuitOpen(f"{name} circuit is open")
+    try:
+        result = _call_with_retries(func, retries, delay, name)
+    except Exception:
+        if breaker:
+            breaker.record_failure()
+            if breaker.is_open():
+                print(f"  🔌 {name} circuit opened after {breaker.failures} failed calls")
+        raise
+    if breaker:
+        breaker.record_success()
+    return result
+
+def cached_api_call(endpoint, params, func):
+    """
+    Returns the DataFrames of an nba_api endpoint call, going through the on-disk cache.
+    `params` identifies the request; `func` builds the endpoint when the cache misses.
+    In offline mode stale entries are served and the network is never touched;
+    online, a failed request (retries exhausted, circuit open, deadline) falls
+    back to the stale entry if there is one.
+    """
+    key = cache.make_key(endpoint, params)
+    frames = cache.load(key, ttl=CACHE_TTL.get(endpoint, CACHE_DURATION))
+    if frames is not None:
+        metrics.add(cache_hits=1)
+        return frames
+
+    if cache.is_offline():
+        frames = cache.load(key, ttl=None)
+        if frames is None:
+            raise cache.CacheMiss(f"{endpoint} {params}")
+        print(f"  📦 Offline: serving cached {endpoint}")
+        metrics.add(cache_hits=1)
+        return frames
+
+    try:
+        frames = retry_api_call(throttled(func), name=endpoint).get_data_frames()
+    except Exception as e:
+        # Degrade to the last good payload rather than an empty table
+        frames = cache.load(key, ttl=None)
+        if frames is None:
+            raise
+        print(f"  📦 {endpoint} unavailable ({type(e).__name__}), serving last cached payload")
+        metrics.add(stale_hits=1)
+        return frames
+    cache.store(key, endpoint, params, frames)
+    return frames
+
+@metrics.timed('fetch.schedule', rows=len)
 def get_schedule(start_date, end_date, season='2025-26'):
     """
     Fetches schedule between start_date and end_date.
     Returns a DataFrame with columns: [TEAM_ID, TEAM_ABBREVIATION, GAME_DATE, MATCHUP]
+    in the compact schema (int32 ids, categorical team/matchup, datetime64 dates).
     """
     start_str = start_date.strftime('%m/%d/%Y')
     end_str = end_date.strftime('%m/%d/%Y')
     
     def fetch_schedule():
+        from nba_api.stats.endpoints import leaguegamefinder
         return leaguegamefinder.LeagueGameFinder(
             league_id_nullable='00',
             date_from_nullable=start_str,
             date_to_nullable=end_str,
             season_nullable=season, # Explicitly request the season
             season_type_nullable='Regular Season',
-            timeout=120, # Increase timeout
+            timeout=request_timeout(), # Capped by the run deadline
             headers=HEADERS
         )
 
+    params = {'date_from': start_str, 'date_to': end_str, 'season': season}
     try:
-        game_finder = retry_api_call(fetch_schedule)
-        games = game_finder.get_data_frames()[0]
+        games = cached_api_call('LeagueGameFinder', params, fetch_schedule)[0]
     except Exception:
         return pd.DataFrame()
     
     if games.empty:
         return pd.DataFrame()
 
-    # Filter and clean
-    games = games[['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP']]
-    games['GAME_DATE'] = pd.to_datetime(games['GAME_DATE']).dt.date
-    
-    # Ensure TEAM_ID is int for merging
-    games['TEAM_ID'] = games['TEAM_ID'].astype(int)
-    
-    return games
+    # Filter and clean (typed: int32 TEAM_ID, categorical strings, datetime64 GAME_DATE)
+    return schema.enforce(games[['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE', 'MATCHUP']])
 
-def get_player_stats_multi_period(season='2025-26'):
+@metrics.timed('fetch.season_schedule', rows=len)
+def get_season_schedule(season='2025-26'):
     """
-    Fetches stats for:
-    1. Season (e.g. 2025-26)
-    2. Last 7 Days
-    3. Last 14 Days
-    
-    Returns a dictionary of DataFrames: {'Season': df, 'L7': df, 'L14': df}
+    Fetches the full regular-season schedule (played and upcoming games) in one
+    ScheduleLeagueV2 request. Returns the get_schedule columns, two team rows
+    per game sorted by date (empty on failure).
     """
+    def fetch():
+        from nba_api.stats.endpoints import scheduleleaguev2
+        return scheduleleaguev2.ScheduleLeagueV2(
+            league_id='00',
+            season=season,
+            timeout=request_timeout(),
+            headers=HEADERS
+        )
+
+    try:
+        games = cached_api_call('ScheduleLeagueV2', {'season': season}, fetch)[0]
+    except Exception:
+        return pd.DataFrame()
+    if games.empty:
+        return pd.DataFrame()
+
+    # Regular season only (game ids 002...), teams known (no TBD knockout slots)
+    games = games[(games['gameId'].astype(str).str[2] == '2') & (games['homeTeam_teamId'] > 0) & (games['awayTeam_teamId'] > 0)]
+    game_date = pd.to_datetime(games['gameDateEst'].astype(str).str[:10])
+    home, away = games['homeTeam_teamTricode'], games['awayTeam_teamTricode']
+    rows = pd.concat([
+        pd.DataFrame({'TEAM_ID': games['homeTeam_teamId'], 'TEAM_ABBREVIATION': home, 'GAME_DATE': game_date, 'MATCHUP': home + ' vs. ' + away}),
+        pd.DataFrame({'TEAM_ID': games['awayTeam_teamId'], 'TEAM_ABBREVIATION': away, 'GAME_DATE': game_date, 'MATCHUP': away + ' @ ' + home}),
+    ])
+    rows = rows.sort_values(['GAME_DATE', 'TEAM_ID'], kind='stable').reset_index(drop=True)
+    return schema.enforce(rows)
+
+@metrics.timed('sync.season_schedule', rows=len)
+def sync_season_schedule(season='2025-26'):
+    """
+    Returns the season schedule from the local store (see gamelog.py). It is
+    re-fetched at most once per CACHE_TTL['ScheduleLeagueV2'] (never offline)
+    and rewritten only when a game moved, so rest-of-season horizons cost one
+    request a day. A failed fetch keeps serving the stored schedule.
+    """
+    age = gamelog.schedule_age(season)
+    if age is None or (age > CACHE_TTL['ScheduleLeagueV2'] and not cache.is_offline()):
+        games = get_season_schedule(season)
+        if not games.empty and gamelog.write_schedule(season, games):
+            print(f"  📅 Season schedule updated ({len(games) // 2} games)")
+    games = gamelog.load_schedule(season)
+    return schema.enforce(games) if not games.empty else pd.DataFrame()
+
+@metrics.timed('fetch.player_stats', rows=len)
+def get_player_stats(date_from=None, season='2025-26', last_n_games=0):
+    """
+    Fetches per-game player stats for the season, optionally only from date_from
+    or over each player's last_n_games.
+    Returns a DataFrame (empty on failure).
+    """
+    date_from_str = date_from.strftime('%m/%d/%Y') if date_from else ''
     
-    # Helper to fetch stats with optional date filter
-    def fetch_stats(date_from=None):
-        date_from_str = date_from.strftime('%m/%d/%Y') if date_from else ''
-        
-        def fetch():
-            return leaguedashplayerstats.LeagueDashPlayerStats(
-                per_mode_detailed='PerGame',
-                season=season, # Explicitly request the season
-                season_type_all_star='Regular Season',
-                date_from_nullable=date_from_str,
-                timeout=120,
-                headers=HEADERS
-            )
-            
-        try:
-            stats = retry_api_call(fetch)
-            df = stats.get_data_frames()[0]
-        except Exception:
-            return pd.DataFrame() # Return empty on failure
+    def fetch():
+        from nba_api.stats.endpoints import leaguedashplayerstats
+        return leaguedashplayerstats.LeagueDashPlayerStats(
+            per_mode_detailed='PerGame',
+            season=season, # Explicitly request the season
+            season_type_all_star='Regular Season',
+            date_from_nullable=date_from_str,
+            last_n_games=last_n_games,
+            timeout=request_timeout(),
+            headers=HEADERS
+        )
         
-        # Select key columns
-        cols = [
-            'PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP',
-            'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'FG_PCT', 'FT_PCT', 'FG3M'
-        ]
-        # Ensure columns exist
-        existing_cols = [c for c in cols if c in df.columns]
-        df = df[existing_cols]
-        df['TEAM_ID'] = df['TEAM_ID'].astype(int)
-        return df
-
-    print("  Fetching Season Stats...")
-    df_season = fetch_stats()
-    
-    # Calculate dates
-    today = datetime.now().date()
-    
-    # Check if we need Time Travel for L7/L14
-    # If df_season is empty or very small, we might be in off-season or wrong date.
-    # But assuming Season stats work (as verified before).
+    params = {'season': season, 'date_from': date_from_str, 'last_n_games': last_n_games}
+    try:
+        df = cached_api_call('LeagueDashPlayerStats', params, fetch)[0]
+    except Exception:
+        return pd.DataFrame() # Return empty on failure
     
-    # L7
-    d7 = today - timedelta(days=7)
-    print(f"  Fetching L7 Stats (from {d7})...")
-    df_l7 = fetch_stats(d7)
+    # Select key columns
+    cols = [
+        'PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP',
+        'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'FG_PCT', 'FT_PCT', 'FG3M'
+    ]
+    # Ensure columns exist
+    existing_cols = [c for c in cols if c in df.columns]
+    return schema.enforce(df[existing_cols])
+
+def get_period_start(period, today=None):
+    """
+    Returns the date_from for a day-based STAT_PERIODS key (None otherwise).
+    """
+    window = STAT_PERIODS[period][1]
+    if window is None or window[0] != 'days':
+        return None
+    today = today or datetime.now().date()
+    return today - timedelta(days=window[1])
+
+@metrics.timed('fetch.game_logs', rows=len)
+def get_game_logs(date_from=None, season='2025-26'):
+    """
+    Fetches one row per player per game played, from date_from (inclusive) onwards.
+    Returns a DataFrame with gamelog.LOG_COLUMNS (empty on failure).
+    """
+    date_from_str = date_from.strftime('%m/%d/%Y') if date_from else ''
+
+    def fetch():
+        from nba_api.stats.endpoints import leaguegamelog
+        return leaguegamelog.LeagueGameLog(
+            player_or_team_abbreviation='P',
+            season=season, # Explicitly request the season
+            season_type_all_star='Regular Season',
+            date_from_nullable=date_from_str,
+            timeout=request_timeout(),
+            headers=HEADERS
+        )
+
+    params = {'season': season, 'date_from': date_from_str}
+    try:
+        df = cached_api_call('LeagueGameLog', params, fetch)[0]
+    except Exception:
+        return pd.DataFrame(columns=gamelog.LOG_COLUMNS)
+
+    if df.empty or any(c not in df.columns for c in gamelog.LOG_COLUMNS):
+        return pd.DataFrame(columns=gamelog.LOG_COLUMNS)
+    return df[gamelog.LOG_COLUMNS]
+
+@metrics.timed('sync.game_logs')
+def sync_game_logs(season='2025-26'):
+    """
+    Brings the local game-log store up to date with a single delta request.
+    The most recent stored date is re-fetched so late-finishing games are picked up.
+    Returns the number of game dates written.
+    """
+    last = gamelog.last_synced_date(season)
+    print(f"  Syncing game logs{f' (from {last})' if last else ' (full season)'}...")
+    new_games = get_game_logs(last, season=season)
+    return gamelog.write_games(season, new_games)
+
+@metrics.timed('stats.multi_period', rows=lambda stats: sum(len(df) for df in stats.values()))
+def get_player_stats_multi_period(season='2025-26', as_of=None):
+    """
+    Returns per-game stats for every STAT_PERIODS window:
+    Season (e.g. 2025-26), Last 7/14/30 Days, Last 10 Games.
     
-    # L14
-    d14 = today - timedelta(days=14)
-    print(f"  Fetching L14 Stats (from {d14})...")
-    df_l14 = fetch_stats(d14)
+    Windows are computed from the local game-log store (synced first) by a
+    WindowEngine, so the whole call costs one small delta request. as_of
+    (default today) reproduces the windows for a past date. Falls back to one
+    LeagueDashPlayerStats request per period if the store is unavailable.
     
-    return {
-        'Season': df_season,
-        'L7': df_l7,
-        'L14': df_l14
-    }
+    Returns a dictionary of DataFrames: {'Season': df, 'L7': df, 'L14': df, ...}
+    """
+    as_of = as_of or datetime.now().date()
+    sync_game_logs(season)
+    logs = gamelog.load_games(season, date_to=as_of)
+
+    if logs.empty:
+        print("  ⚠️ Game-log store is empty, fetching period stats directly...")
+        with ThreadPoolExecutor(max_workers=len(STAT_PERIODS)) as pool:
+            futures = {}
+            for period, (_, window) in STAT_PERIODS.items():
+                last_n = window[1] if window and window[0] == 'games' else 0
+                futures[period] = pool.submit(get_player_stats, get_period_start(period, as_of), season, last_n)
+            return {period: f.result() for period, f in futures.items()}
+
+    engine = WindowEngine(logs)
+    stats = engine.windows({period: window for period, (_, window) in STAT_PERIODS.items()}, as_of=as_of)
+    return {period: schema.enforce(df) for period, df in stats.items()}
 
+@metrics.timed('fetch.def_ratings', rows=len)
 def get_team_defensive_ratings(season='2025-26'):
     """
     Fetches team defensive ratings.
@@ -141,22 +470,23 @@ def get_team_defensive_ratings(season='2025-26'):
     """
     # Use 'Advanced' to get DEF_RATING
     def fetch_def():
+        from nba_api.stats.endpoints import leaguedashteamstats
         return leaguedashteamstats.LeagueDashTeamStats(
             per_mode_detailed='PerGame',
             season=season, # Explicitly request the season
             season_type_all_star='Regular Season',
             measure_type_detailed_defense='Advanced',
-            timeout=120,
+            timeout=request_timeout(),
             headers=HEADERS
         )
         
     try:
-        stats_adv = retry_api_call(fetch_def)
-        df = stats_adv.get_data_frames()[0]
+        df = cached_api_call('LeagueDashTeamStats', {'season': season, 'measure': 'Advanced'}, fetch_def)[0]
     except Exception:
         return {} # Return empty dict on failure
     
     # Create ID -> Abbr map
+    from nba_api.stats.static import teams
     nba_teams = teams.get_teams()
     id_to_abbr = {team['id']: team['abbreviation'] for team in nba_teams}
     
@@ -170,17 +500,186 @@ def get_team_defensive_ratings(season='2025-26'):
     df['DEF_RANK'] = range(1, len(df) + 1)
     
     # Create map: ABBR -> Rank
-    def_map = {}
-    for _, row in df.iterrows():
-        tid = row['TEAM_ID']
-        abbr = id_to_abbr.get(tid, 'UNK')
-        
-        def_map[abbr] = {
-            'Rank': row['DEF_RANK'],
-            'DefRtg': row.get('DEF_RATING', 0.0)
-        }
-        
-    return def_map
+    abbrs = df['TEAM_ID'].map(id_to_abbr).fillna('UNK')
+    ratings = df['DEF_RATING'] if 'DEF_RATING' in df.columns else pd.Series(0.0, index=df.index)
+    return {
+        abbr: {'Rank': int(rank), 'DefRtg': float(rating)}
+        for abbr, rank, rating in zip(abbrs, df['DEF_RANK'], ratings)
+    }
+
+@metrics.timed('fetch.positions', rows=len)
+def get_player_positions(season='2025-26'):
+    """
+    Fetches every player's listed position (e.g. 'G', 'F-C') from PlayerIndex.
+    Returns a dict: {PLAYER_ID: position} (empty on failure).
+    """
+    def fetch():
+        from nba_api.stats.endpoints import playerindex
+        return playerindex.PlayerIndex(
+            season=season, # Explicitly request the season
+            league_id='00',
+            timeout=request_timeout(),
+            headers=HEADERS
+        )
+
+    try:
+        df = cached_api_call('PlayerIndex', {'season': season}, fetch)[0]
+    except Exception:
+        return {}
+
+    if df.empty or 'PERSON_ID' not in df.columns or 'POSITION' not in df.columns:
+        return {}
+    return dict(zip(df['PERSON_ID'].astype(int), df['POSITION'].fillna('').astype(str)))
+
+@metrics.timed('stats.dvp')
+def get_defense_vs_position(season='2025-26', positions=None):
+    """
+    Returns the defense-vs-position matrix (a dvp.DefenseVsPosition) built
+    from the local game-log store, folding in only the dates added since the
+    last run. Without game logs it holds no data and callers use team ranks.
+    """
+    return dvp.update(season, positions)
+
+def fetch_all(start_date, end_date, season='2025-26', max_workers=MAX_IN_FLIGHT, full_season=False):
+    """
+    Runs the schedule, player stats, defensive ratings and positions requests concurrently.
+    Returns (schedule_df, stats_dict, def_ratings, dvp_table), the same values as
+    get_schedule, get_player_stats_multi_period, get_team_defensive_ratings and
+    get_defense_vs_position (built once the game-log store is synced).
+    With full_season the schedule is the whole stored season (sync_season_schedule)
+    instead of the start_date..end_date window.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if full_season:
+            schedule_future = pool.submit(sync_season_schedule, season)
+        else:
+            schedule_future = pool.submit(get_schedule, start_date, end_date, season)
+        stats_future = pool.submit(get_player_stats_multi_period, season)
+        def_future = pool.submit(get_team_defensive_ratings, season)
+        positions_future = pool.submit(get_player_positions, season)
+
+        schedule = schedule_future.result()
+        stats = stats_future.result()
+        def_ratings = def_future.result()
+        dvp_table = get_defense_vs_position(season, positions_future.result())
+
+    return schedule, stats, def_ratings, dvp_table
+
+class ScheduleIndex:
+    """
+    Precomputed team x day view of a schedule (as returned by get_schedule).
+
+    Holds a games matrix with opponent/home arrays and prefix sums over days,
+    so games in any date range, back-to-backs, light-slate games and
+    remaining games are answered in O(1) per team (or one vector op for all teams).
+    Teams can be given by TEAM_ID or abbreviation; dates outside the index are clamped.
+    """
+    def __init__(self, schedule_df, start_date, end_date, light_slate_max=LIGHT_SLATE_MAX_GAMES):
+        self.start_date = start_date
+        self.end_date = end_date
+        n_days = max((end_date - start_date).days + 1, 0)
+        self.days = [start_date + timedelta(days=i) for i in range(n_days)]
+
+        # Team axis: every NBA team, plus any unexpected id found in the schedule
+        from nba_api.stats.static import teams
+        nba_teams = sorted(teams.get_teams(), key=lambda t: t['id'])
+        self.team_ids = np.array([t['id'] for t in nba_teams], dtype=np.int64)
+        self.team_abbrs = np.array([t['abbreviation'] for t in nba_teams], dtype=object)
+        if not schedule_df.empty:
+            # Distinct ids in one pass; unexpected ones are appended in order of first appearance
+            ids, first = np.unique(schedule_df['TEAM_ID'].to_numpy(dtype=np.int64), return_index=True)
+            extra = ~np.isin(ids, self.team_ids)
+            first = np.sort(first[extra])
+            self.team_ids = np.concatenate([self.team_ids, schedule_df['TEAM_ID'].to_numpy(dtype=np.int64)[first]])
+            self.team_abbrs = np.concatenate([self.team_abbrs, schedule_df['TEAM_ABBREVIATION'].to_numpy(dtype=object)[first]])
+        self._team_pos = {tid: i for i, tid in enumerate(self.team_ids)}
+        self._team_pos.update({abbr: i for i, abbr in enumerate(self.team_abbrs)})
+
+        n_teams = len(self.team_ids)
+        self.games = np.zeros((n_teams, n_days), dtype=np.int8)
+        self.opp = np.full((n_teams, n_days), -1, dtype=np.int16)
+        self.home = np.zeros((n_teams, n_days), dtype=bool)
+
+        if not schedule_df.empty and n_days:
+            # datetime64 day arithmetic, no per-row date objects
+            game_days = pd.to_datetime(schedule_df['GAME_DATE']).to_numpy().astype('datetime64[D]')
+            day_idx = (game_days - np.datetime64(start_date, 'D')).astype(np.int64)
+            in_range = (day_idx >= 0) & (day_idx < n_days)
+            games = schedule_df[in_range]
+            day_idx = day_idx[in_range]
+
+            if not games.empty:
+                rows = games['TEAM_ID'].map(self._team_pos).to_numpy(dtype=np.int64)
+                # Matchups are parsed once per distinct value, then gathered by category code
+                matchups = games['MATCHUP'].astype('category')
+                matchup_parts = matchups.cat.categories.to_series().str.split(' ', expand=True)
+                codes = matchups.cat.codes.to_numpy()
+                self.games[rows, day_idx] = 1
+                self.opp[rows, day_idx] = matchup_parts[2].map(self._team_pos).fillna(-1).to_numpy(dtype=np.int64)[codes]
+                self.home[rows, day_idx] = (matchup_parts[1] == 'vs.').to_numpy(dtype=bool)[codes]
+
+        # Derived per-day flags
+        self.games_per_night = self.games.sum(axis=0) // 2
+        self.light_nights = (self.games_per_night > 0) & (self.games_per_night <= light_slate_max)
+        b2b = np.zeros_like(self.games)
+        b2b[:, 1:] = self.games[:, 1:] & self.games[:, :-1] # Second leg of a back-to-back
+        light = self.games * self.light_nights
+
+        # Prefix sums along days: cum[:, i] = count over days [0, i)
+        def prefix(m):
+            return np.concatenate([np.zeros((n_teams, 1), dtype=np.int32), np.cumsum(m, axis=1, dtype=np.int32)], axis=1)
+        self._cum_games = prefix(self.games)
+        self._cum_b2b = prefix(b2b)
+        self._cum_light = prefix(light)
+
+    def day_index(self, d):
+        """Position of date d on the day axis, clamped to [0, n_days]."""
+        return min(max((d - self.start_date).days, 0), len(self.days))
+
+    def team_index(self, team):
+        return self._team_pos[team]
+
+    def team_rows(self, teams_seq):
+        """Rows of the team axis for a sequence of ids/abbreviations (-1 where unknown)."""
+        teams_seq = pd.Series(teams_seq)
+        if isinstance(teams_seq.dtype, pd.CategoricalDtype):
+            # Look up each category once, then gather by code (-1 codes are missing values)
+            cat_rows = pd.Series(teams_seq.cat.categories).map(self._team_pos).fillna(-1).to_numpy(dtype=np.int64)
+            return np.append(cat_rows, -1)[teams_seq.cat.codes.to_numpy()]
+        return teams_seq.map(self._team_pos).fillna(-1).to_numpy(dtype=np.int64)
+
+    def _range(self, cum, start, end, team):
+        lo = self.day_index(start)
+        hi = max(self.day_index(end + timedelta(days=1)), lo) # A reversed range has no games
+        if team is None:
+            return cum[:, hi] - cum[:, lo]
+        row = self._team_pos[team]
+        return int(cum[row, hi] - cum[row, lo])
+
+    def games_between(self, start, end, team=None):
+        """Games from start to end (inclusive), for one team or as an array over all teams."""
+        return self._range(self._cum_games, start, end, team)
+
+    def back_to_backs(self, start, end, team=None):
+        """Back-to-back sets with both games between start and end (inclusive)."""
+        return self._range(self._cum_b2b, start + timedelta(days=1), end, team)
+
+    def light_slate_games(self, start, end, team=None):
+        """Games played on light-slate nights between start and end (inclusive)."""
+        return self._range(self._cum_light, start, end, team)
+
+    def remaining_games(self, from_date, team=None):
+        """Games from from_date to the end of the index."""
+        return self.games_between(from_date, self.end_date, team)
+
+    def games_by_week(self, weeks):
+        """
+        Games of every team in each week (dicts with start/end dates) as a
+        (teams, weeks) array, gathered from the prefix sums in one step.
+        """
+        lo = [self.day_index(w['start']) for w in weeks]
+        hi = [self.day_index(w['end'] + timedelta(days=1)) for w in weeks]
+        return self._cum_games[:, hi] - self._cum_games[:, lo]
 
 def get_color_for_rank(rank):
     """
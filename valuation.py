@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+
+# 9-category league: counting stats per game (TOV counts against) plus the two
+# percentages, which are weighted by attempt volume.
+CATEGORIES = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FG3M', 'TOV', 'FG_PCT', 'FT_PCT']
+NEGATIVE_CATEGORIES = {'TOV'}
+PCT_VOLUME = {'FG_PCT': ('FGM', 'FGA'), 'FT_PCT': ('FTM', 'FTA')}
+
+# z-scores are measured against the players a league would roster
+# (13 spots x 12 teams by total minutes), not the whole bench
+POOL_SIZE = 156
+
+# Categories left out of the total (comma-separated, e.g. 'FT_PCT,TOV')
+PUNT = [c for c in os.environ.get('NBA_PUNT', '').split(',') if c]
+
+class ValuationEngine:
+    """
+    Per-category z-scores for every player in every stat period, as one
+    (periods x players x categories) array.
+
+    Periods are aligned on the union of player ids (NaN where a player has no
+    games in a period). FG% and FT% enter as volume-weighted impact, i.e. makes
+    above what the pool's percentage would give on the same attempts, so a
+    60% shooter on 2 attempts counts less than 50% on 20. Totals for a set of
+    categories (punts) are a weighted sum over the last axis, so changing the
+    settings never recomputes the z-scores.
+    """
+    def __init__(self, stats_dict, categories=CATEGORIES, pool_size=POOL_SIZE):
+        self.periods = list(stats_dict)
+        self.categories = list(categories)
+        frames = [stats_dict[p] for p in self.periods]
+        ids = [df['PLAYER_ID'].to_numpy() if 'PLAYER_ID' in df.columns else np.array([], dtype=np.int64) for df in frames]
+        self.player_ids = np.unique(np.concatenate(ids)) if ids else np.array([], dtype=np.int64)
+
+        n_p, n_k = len(self.periods), len(self.categories)
+        raw = np.full((n_p, len(self.player_ids), n_k), np.nan)
+        self.in_pool = np.zeros((n_p, len(self.player_ids)), dtype=bool)
+        for i, (df, pid) in enumerate(zip(frames, ids)):
+            if not len(pid):
+                continue
+            rows = np.searchsorted(self.player_ids, pid)
+            pool = self._pool(df, pool_size)
+            self.in_pool[i, rows] = pool
+            for k, cat in enumerate(self.categories):
+                raw[i, rows, k] = self._category(df, cat, pool)
+
+        # z-scores against the pool of each period
+        pool_values = np.where(self.in_pool[:, :, None], raw, np.nan)
+        count = np.sum(~np.isnan(pool_values), axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(pool_values, axis=1, keepdims=True) / count
+            std = np.sqrt(np.nansum((pool_values - mean) ** 2, axis=1, keepdims=True) / count)
+            z = (raw - mean) / np.where(std > 0, std, np.nan)
+        z[..., [k for k, c in enumerate(self.categories) if c in NEGATIVE_CATEGORIES]] *= -1
+        self.zscores = z
+
+    @staticmethod
+    def _pool(df, pool_size):
+        """Boolean mask of the pool_size players with the most total minutes."""
+        minutes = pd.to_numeric(df.get('MIN', pd.Series(0, index=df.index)), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        games = pd.to_numeric(df.get('GP', pd.Series(1, index=df.index)), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        total = minutes * games
+        pool = np.zeros(len(df), dtype=bool)
+        pool[np.argsort(-total, kind='stable')[:pool_size]] = True
+        return pool & (total > 0)
+
+    @staticmethod
+    def _category(df, cat, pool):
+        """Raw per-player value of one category (NaN if the frame lacks it)."""
+        if cat in PCT_VOLUME:
+            makes, attempts = PCT_VOLUME[cat]
+            if makes in df.columns and attempts in df.columns:
+                m = df[makes].to_numpy(dtype=np.float64)
+                a = df[attempts].to_numpy(dtype=np.float64)
+                pool_a = np.nansum(a[pool])
+                pool_pct = np.nansum(m[pool]) / pool_a if pool_a > 0 else 0.0
+                return m - pool_pct * a
+        if cat not in df.columns:
+            return np.nan
+        return df[cat].to_numpy(dtype=np.float64) # Percentages without volume columns: plain z
+
+    def weights(self, punt=()):
+        return np.array([0.0 if c in punt else 1.0 for c in self.categories])
+
+    def values(self, punt=()):
+        """
+        Total value (sum of z-scores over non-punted categories) and rank
+        (1 = best, NaN without games) for every period, as two (periods x players) arrays.
+        Categories missing from a period's frame count as 0.
+        """
+        total = np.nan_to_num(self.zscores) @ self.weights(punt)
+        has_games = ~np.all(np.isnan(self.zscores), axis=2)
+        total[~has_games] = np.nan
+
+        order = np.argsort(np.where(has_games, -total, np.inf), axis=1, kind='stable')
+        rank = (np.argsort(order, axis=1) + 1).astype(np.float64)
+        rank[~has_games] = np.nan
+        return total, rank
+
+    def apply(self, stats_dict, punt=()):
+        """
+        Returns a copy of stats_dict with VALUE and RANK columns added to every period's frame.
+        """
+        total, rank = self.values(punt)
+        out = {}
+        for i, p in enumerate(self.periods):
+            df = stats_dict[p].copy()
+            if 'PLAYER_ID' in df.columns and len(df):
+                rows = np.searchsorted(self.player_ids, df['PLAYER_ID'].to_numpy())
+                df['VALUE'] = total[i, rows].astype(np.float32)
+                df['RANK'] = rank[i, rows]
+            out[p] = df
+        return out
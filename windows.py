@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# Counting stats accumulated per player-game. Averages are derived from these
+# sums, FG% and FT% from total makes over total attempts.
+STAT_COLUMNS = ['MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'FG3M', 'TOV', 'FGM', 'FGA', 'FTM', 'FTA']
+OUTPUT_COLUMNS = ['PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP'] + STAT_COLUMNS + ['FG_PCT', 'FT_PCT']
+
+class WindowEngine:
+    """
+    Answers rolling-window stat queries for every player at once.
+
+    Game logs are sorted by (player, date) and turned into prefix sums, so a
+    window is two searchsorted calls and one subtraction per stat, whatever
+    its length: date windows ('days', N), last-N-games windows ('games', N)
+    or the full season (None).
+    """
+    def __init__(self, logs):
+        logs = logs.sort_values(['PLAYER_ID', 'GAME_DATE'], kind='mergesort')
+        player_ids = logs['PLAYER_ID'].to_numpy()
+
+        self.player_ids, codes = np.unique(player_ids, return_inverse=True)
+        days = logs['GAME_DATE'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        self.day_span = int(days.max() - days.min()) + 2 if len(days) else 1
+        self.day_origin = int(days.min()) if len(days) else 0
+
+        # Composite sort key: rows of a player are contiguous and date-ordered
+        self.keys = codes.astype(np.int64) * self.day_span + (days - self.day_origin)
+        self.group_start = np.searchsorted(codes, np.arange(len(self.player_ids)), 'left')
+
+        stats = logs[STAT_COLUMNS].to_numpy(dtype=np.float64)
+        self.cumsum = np.vstack([np.zeros((1, len(STAT_COLUMNS))), np.cumsum(stats, axis=0)])
+
+        self.names = logs['PLAYER_NAME'].to_numpy()
+        self.team_ids = logs['TEAM_ID'].to_numpy()
+        self.team_abbrs = logs['TEAM_ABBREVIATION'].to_numpy()
+
+    def _day(self, d):
+        return int(np.datetime64(d, 'D').astype(np.int64)) - self.day_origin
+
+    def _bounds(self, window, as_of):
+        """Returns (lo, hi) row bounds per player for a window ending at as_of."""
+        codes = np.arange(len(self.player_ids), dtype=np.int64) * self.day_span
+        as_of_day = self._day(as_of) if as_of is not None else self.day_span - 2
+        last_day = min(max(as_of_day, -1), self.day_span - 2)
+        hi = np.searchsorted(self.keys, codes + last_day, 'right')
+
+        if window is None:
+            lo = self.group_start
+        elif window[0] == 'days':
+            first_day = min(max(as_of_day - window[1], -1), self.day_span - 1)
+            lo = np.searchsorted(self.keys, codes + first_day, 'left')
+        elif window[0] == 'games':
+            lo = np.maximum(self.group_start, hi - window[1])
+        else:
+            raise ValueError(f"Unknown window type: {window[0]}")
+        return np.minimum(lo, hi), hi
+
+    def window(self, window=None, as_of=None):
+        """
+        Per-game averages for every player over a window ending at as_of (inclusive),
+        in the layout of utils.get_player_stats. ('days', 7) starts 7 days before as_of,
+        matching the date_from semantics of the stats.nba.com endpoints.
+        """
+        if not len(self.keys):
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+        lo, hi = self._bounds(window, as_of)
+        played = hi > lo
+        lo, hi = lo[played], hi[played]
+        gp = (hi - lo).astype(np.float64)
+        sums = self.cumsum[hi] - self.cumsum[lo]
+
+        latest = hi - 1 # Current team is the one from the latest game in the window
+        df = pd.DataFrame(sums / gp[:, None], columns=STAT_COLUMNS)
+        df.insert(0, 'PLAYER_ID', self.player_ids[played])
+        df.insert(1, 'PLAYER_NAME', self.names[latest])
+        df.insert(2, 'TEAM_ID', self.team_ids[latest].astype(int))
+        df.insert(3, 'TEAM_ABBREVIATION', self.team_abbrs[latest])
+        df.insert(4, 'GP', gp.astype(int))
+
+        fgm, fga = sums[:, STAT_COLUMNS.index('FGM')], sums[:, STAT_COLUMNS.index('FGA')]
+        ftm, fta = sums[:, STAT_COLUMNS.index('FTM')], sums[:, STAT_COLUMNS.index('FTA')]
+        df['FG_PCT'] = np.divide(fgm, fga, out=np.zeros_like(fgm), where=fga > 0)
+        df['FT_PCT'] = np.divide(ftm, fta, out=np.zeros_like(ftm), where=fta > 0)
+        return df
+
+    def windows(self, specs, as_of=None):
+        """
+        Evaluates several windows, e.g. {'L7': ('days', 7), 'G10': ('games', 10)}.
+        Returns a dict of DataFrames with the same keys.
+        """
+        return {key: self.window(spec, as_of=as_of) for key, spec in specs.items()}